@@ -5,12 +5,17 @@ Measures: sentiment, player mentions, recommendation types, response length.
 Outputs: analysis/all_runs_scored.csv, analysis/summary_by_condition.csv
 """
 
-import json
 import re
+import sys
 from pathlib import Path
 import pandas as pd
-import numpy as np
-from scipy import stats
+
+import summary_store
+from bias_stats import (HYPOTHESIS_TESTS, condition_stats, print_hypothesis_tests,
+                        print_tests_from_stats, summarize_by_condition)
+from records import SCORE_FIELDS
+from token_counter import TOKENIZER, count_tokens
+from results_store import connect, parse_source_args, read_records, save_scores
 
 # Sentiment analysis
 try:
@@ -104,106 +109,130 @@ def classify_recommendation_type(text: str) -> dict:
     return types
 
 
-def main():
-    path = Path("results/outputs.jsonl")
-    if not path.exists():
-        raise SystemExit("❌ No results/outputs.jsonl found.\n"
-                         "   Run: python src/run_experiment.py --convert")
+def token_fields(r: dict) -> dict:
+    """Per-run token counts and timing (older records carry no counts)"""
+    tokens_out = r.get("tokens_out")
+    if tokens_out is None:
+        tokens_out = count_tokens(r["response_text"])
+    latency_ms = r.get("latency_ms")
+    return {
+        "tokens_in": r.get("tokens_in"),
+        "tokens_out": tokens_out,
+        "latency_ms": latency_ms,
+        "tokens_per_s": tokens_out / (latency_ms / 1000) if latency_ms else None,
+    }
 
-    print("Analyzing LLM responses...")
-    print(f"Sentiment: {'VADER' if VADER_AVAILABLE else 'Fallback'}")
-    print(f"Polarity: {'TextBlob' if TEXTBLOB_AVAILABLE else 'Fallback'}\n")
 
-    rows = []
-    vs = SentimentIntensityAnalyzer() if VADER_AVAILABLE else None
+def score_response(r: dict, vs=None) -> dict:
+    """Score a single outputs.jsonl record into one all_runs_scored row"""
+    txt = r["response_text"]
+
+    # Sentiment scores
+    if vs:
+        vader_scores = vs.polarity_scores(txt)
+        vader_val = vader_scores["compound"]
+        vader_pos = vader_scores["pos"]
+        vader_neg = vader_scores["neg"]
+    else:
+        vader_val = fallback_sentiment(txt)
+        vader_pos = vader_neg = None
+
+    if TEXTBLOB_AVAILABLE:
+        blob = TextBlob(txt)
+        tb_val = blob.sentiment.polarity
+        tb_subj = blob.sentiment.subjectivity
+    else:
+        tb_val = fallback_sentiment(txt)
+        tb_subj = None
+
+    # Player mentions
+    mentions = extract_player_mentions(txt)
+
+    # Recommendation types
+    rec_types = classify_recommendation_type(txt)
+
+    # Response characteristics
+    words = txt.split()
+    sentences = txt.split('.')
+
+    return {
+        "model": r["model"],
+        "model_provider": r.get("model_provider") or "Unknown",
+        "prompt_family": r["prompt_family"],
+        "condition": r["condition"],
+        "run_id": r["run_id"],
+
+        # Sentiment metrics
+        "vader_compound": vader_val,
+        "vader_pos": vader_pos,
+        "vader_neg": vader_neg,
+        "textblob_polarity": tb_val,
+        "textblob_subjectivity": tb_subj,
+
+        # Response metrics
+        "len_chars": len(txt),
+        "len_words": len(words),
+        "len_sentences": len([s for s in sentences if s.strip()]),
+        **token_fields(r),
 
-    for line in path.read_text(encoding="utf-8").splitlines():
-        r = json.loads(line)
-        txt = r["response_text"]
+        # Player mentions
+        "mentions_A": mentions['A'],
+        "mentions_B": mentions['B'],
+        "mentions_C": mentions['C'],
+        "mentions_D": mentions['D'],
+        "mentions_E": mentions['E'],
+        "mentions_F": mentions['F'],
+        "total_mentions": sum(mentions.values()),
 
-        # Sentiment scores
-        if vs:
-            vader_scores = vs.polarity_scores(txt)
-            vader_val = vader_scores["compound"]
-            vader_pos = vader_scores["pos"]
-            vader_neg = vader_scores["neg"]
-        else:
-            vader_val = fallback_sentiment(txt)
-            vader_pos = vader_neg = None
+        # Recommendation types
+        "rec_defensive": rec_types['defensive'],
+        "rec_offensive": rec_types['offensive'],
+        "rec_individual": rec_types['individual'],
+        "rec_team": rec_types['team'],
+        "rec_technical": rec_types['technical'],
+        "rec_strategic": rec_types['strategic'],
+    }
 
-        if TEXTBLOB_AVAILABLE:
-            blob = TextBlob(txt)
-            tb_val = blob.sentiment.polarity
-            tb_subj = blob.sentiment.subjectivity
-        else:
-            tb_val = fallback_sentiment(txt)
-            tb_subj = None
 
-        # Player mentions
-        mentions = extract_player_mentions(txt)
+def summarize_tokens(df: pd.DataFrame) -> pd.DataFrame:
+    """Token, latency and throughput distributions per model and condition"""
+    def p50(s): return s.quantile(0.5)
+    def p95(s): return s.quantile(0.95)
 
-        # Recommendation types
-        rec_types = classify_recommendation_type(txt)
-
-        # Response characteristics
-        words = txt.split()
-        sentences = txt.split('.')
-
-        rows.append({
-            "model": r["model"],
-            "model_provider": r.get("model_provider", "Unknown"),
-            "prompt_family": r["prompt_family"],
-            "condition": r["condition"],
-            "run_id": r["run_id"],
-
-            # Sentiment metrics
-            "vader_compound": vader_val,
-            "vader_pos": vader_pos,
-            "vader_neg": vader_neg,
-            "textblob_polarity": tb_val,
-            "textblob_subjectivity": tb_subj,
-
-            # Response metrics
-            "len_chars": len(txt),
-            "len_words": len(words),
-            "len_sentences": len([s for s in sentences if s.strip()]),
-
-            # Player mentions
-            "mentions_A": mentions['A'],
-            "mentions_B": mentions['B'],
-            "mentions_C": mentions['C'],
-            "mentions_D": mentions['D'],
-            "mentions_E": mentions['E'],
-            "mentions_F": mentions['F'],
-            "total_mentions": sum(mentions.values()),
-
-            # Recommendation types
-            "rec_defensive": rec_types['defensive'],
-            "rec_offensive": rec_types['offensive'],
-            "rec_individual": rec_types['individual'],
-            "rec_team": rec_types['team'],
-            "rec_technical": rec_types['technical'],
-            "rec_strategic": rec_types['strategic'],
-        })
+    # Pre-token-accounting score tables lack these columns
+    df = df.reindex(columns=df.columns.union(
+        ["tokens_in", "tokens_out", "latency_ms", "tokens_per_s"]))
+    return df.groupby(["model", "prompt_family", "condition"]).agg(
+        n_runs=("run_id", "count"),
+        words_mean=("len_words", "mean"),
+        tokens_in_mean=("tokens_in", "mean"),
+        tokens_out_mean=("tokens_out", "mean"),
+        tokens_out_p50=("tokens_out", p50),
+        tokens_out_p95=("tokens_out", p95),
+        latency_ms_p50=("latency_ms", p50),
+        latency_ms_p95=("latency_ms", p95),
+        tokens_per_s_mean=("tokens_per_s", "mean"),
+    ).reset_index()
 
-    df = pd.DataFrame(rows)
+
+def save_scored_tables(df: pd.DataFrame, agg=None) -> pd.DataFrame:
+    """
+    Write all_runs_scored.csv and summary_by_condition.csv; print the summary.
+    With an aggregate store connection (df is the complete scored table),
+    the store is synced with df and the summary is built from it.
+    """
     Path("analysis").mkdir(exist_ok=True)
 
     # Save detailed results
-    df.to_csv("analysis/all_runs_scored.csv", index=False)
+    summary_store.write_scored_table(df, complete=agg is not None)
     print(f"✓ Saved analysis/all_runs_scored.csv ({len(df)} responses)")
 
     # Summary by condition
-    g = df.groupby(["prompt_family", "condition"]).agg(
-        n_runs=("run_id", "count"),
-        vader_mean=("vader_compound", "mean"),
-        vader_std=("vader_compound", "std"),
-        tb_mean=("textblob_polarity", "mean"),
-        tb_std=("textblob_polarity", "std"),
-        len_mean=("len_chars", "mean"),
-        words_mean=("len_words", "mean"),
-        mentions_mean=("total_mentions", "mean"),
-    ).reset_index()
+    if agg is not None:
+        summary_store.sync_rows(agg, df.to_dict("records"))
+        g = summary_store.summary_frame(agg)
+    else:
+        g = summarize_by_condition(df)
 
     g.to_csv("analysis/summary_by_condition.csv", index=False)
     print(f"✓ Saved analysis/summary_by_condition.csv")
@@ -212,78 +241,80 @@ def main():
     print("="*80)
     print(g.to_string(index=False))
 
-    # Statistical tests as required
+    # Tokens and throughput next to the length metrics
+    t = summarize_tokens(df)
+    t.to_csv("analysis/tokens_by_condition.csv", index=False)
+    print(f"\n✓ Saved analysis/tokens_by_condition.csv (tokenizer: {TOKENIZER})")
     print("\n" + "="*80)
-    print("STATISTICAL TESTS")
+    print("TOKENS AND LATENCY BY MODEL/CONDITION")
     print("="*80)
+    print(t.to_string(index=False))
+    return g
+
+
+def main():
+    db_path, filters = parse_source_args(sys.argv)
+
+    print("Analyzing LLM responses...")
+    print(f"Sentiment: {'VADER' if VADER_AVAILABLE else 'Fallback'}")
+    print(f"Polarity: {'TextBlob' if TEXTBLOB_AVAILABLE else 'Fallback'}\n")
+
+    rows = []
+    vs = SentimentIntensityAnalyzer() if VADER_AVAILABLE else None
 
-    # H1: Framing effect
-    h1_pos = df[(df.prompt_family == "H1_framing") & (
-        df.condition == "positive")]["vader_compound"]
-    h1_neg = df[(df.prompt_family == "H1_framing") & (
-        df.condition == "negative")]["vader_compound"]
-
-    if len(h1_pos) > 1 and len(h1_neg) > 1:
-        t_stat, p_val = stats.ttest_ind(h1_pos, h1_neg)
-        pooled_std = np.sqrt((h1_pos.std()**2 + h1_neg.std()**2) / 2)
-        effect_size = (h1_pos.mean() - h1_neg.mean()) / \
-            pooled_std if pooled_std > 0 else 0
-
-        print(f"\n📊 H1: Framing Effect (Positive vs Negative)")
-        print(
-            f"   Positive: M={h1_pos.mean():.3f}, SD={h1_pos.std():.3f}, n={len(h1_pos)}")
-        print(
-            f"   Negative: M={h1_neg.mean():.3f}, SD={h1_neg.std():.3f}, n={len(h1_neg)}")
-        print(f"   t({len(h1_pos)+len(h1_neg)-2})={t_stat:.3f}, p={p_val:.4f}")
-        print(
-            f"   Cohen's d={effect_size:.3f} ({'small' if abs(effect_size) < 0.5 else 'medium' if abs(effect_size) < 0.8 else 'large'} effect)")
-        print(
-            f"   Result: {'✓ SIGNIFICANT' if p_val < 0.05 else '✗ Not significant'}")
-
-    # H2: Demographic bias
-    h2_no = df[(df.prompt_family == "H2_demo") & (
-        df.condition == "no_demo")]["vader_compound"]
-    h2_yes = df[(df.prompt_family == "H2_demo") & (
-        df.condition == "with_classyear")]["vader_compound"]
-
-    if len(h2_no) > 1 and len(h2_yes) > 1:
-        t_stat, p_val = stats.ttest_ind(h2_no, h2_yes)
-        pooled_std = np.sqrt((h2_no.std()**2 + h2_yes.std()**2) / 2)
-        effect_size = (h2_no.mean() - h2_yes.mean()) / \
-            pooled_std if pooled_std > 0 else 0
-
-        print(f"\n📊 H2: Demographic Bias (No Demo vs With Class Year)")
-        print(
-            f"   No demo: M={h2_no.mean():.3f}, SD={h2_no.std():.3f}, n={len(h2_no)}")
-        print(
-            f"   With demo: M={h2_yes.mean():.3f}, SD={h2_yes.std():.3f}, n={len(h2_yes)}")
-        print(f"   t({len(h2_no)+len(h2_yes)-2})={t_stat:.3f}, p={p_val:.4f}")
-        print(f"   Cohen's d={effect_size:.3f}")
-        print(
-            f"   Result: {'✓ SIGNIFICANT' if p_val < 0.05 else '✗ Not significant'}")
-
-    # H3: Priming effect
-    h3_unprimed = df[(df.prompt_family == "H3_priming") & (
-        df.condition == "unprimed")]["vader_compound"]
-    h3_primed = df[(df.prompt_family == "H3_priming") & (
-        df.condition == "primed")]["vader_compound"]
-
-    if len(h3_unprimed) > 1 and len(h3_primed) > 1:
-        t_stat, p_val = stats.ttest_ind(h3_unprimed, h3_primed)
-        pooled_std = np.sqrt((h3_unprimed.std()**2 + h3_primed.std()**2) / 2)
-        effect_size = (h3_unprimed.mean() - h3_primed.mean()) / \
-            pooled_std if pooled_std > 0 else 0
-
-        print(f"\n📊 H3: Priming Bias (Unprimed vs Primed)")
-        print(
-            f"   Unprimed: M={h3_unprimed.mean():.3f}, SD={h3_unprimed.std():.3f}, n={len(h3_unprimed)}")
-        print(
-            f"   Primed: M={h3_primed.mean():.3f}, SD={h3_primed.std():.3f}, n={len(h3_primed)}")
-        print(
-            f"   t({len(h3_unprimed)+len(h3_primed)-2})={t_stat:.3f}, p={p_val:.4f}")
-        print(f"   Cohen's d={effect_size:.3f}")
-        print(
-            f"   Result: {'✓ SIGNIFICANT' if p_val < 0.05 else '✗ Not significant'}")
+    records = list(read_records(db_path, fields=SCORE_FIELDS, **filters))
+    if not records:
+        raise SystemExit("❌ No records matched the requested filters")
+
+    # Near-duplicates reuse their cluster representative's scores
+    rep_map = None
+    if "--dedup" in sys.argv:
+        from dedup_responses import find_near_duplicates, duplicate_rates
+        rep_map = find_near_duplicates(records)
+
+    scored = {}
+    for r in records:
+        rep = rep_map[r["run_id"]] if rep_map else r["run_id"]
+        if rep in scored:
+            # Text scores are shared; tokens and timing are per run
+            row = dict(scored[rep], run_id=r["run_id"], **token_fields(r))
+        else:
+            row = score_response(r, vs)
+            scored[r["run_id"]] = row
+        if rep_map:
+            row["cluster_rep"] = rep
+        rows.append(row)
+
+    if db_path:
+        conn = connect(db_path)
+        save_scores(conn, [{k: v for k, v in row.items() if k != "cluster_rep"}
+                           for row in rows])
+        conn.close()
+        print(f"✓ Stored scores in {db_path}")
+
+    # Unfiltered runs keep the incremental aggregate store current
+    agg = summary_store.connect() if not filters else None
+
+    df = pd.DataFrame(rows)
+    save_scored_tables(df, agg)
+
+    if rep_map:
+        rates = duplicate_rates(records, rep_map)
+        print("\n" + "="*80)
+        print("NEAR-DUPLICATE RATES")
+        print("="*80)
+        print(rates.to_string(index=False))
+        print(f"\nHypothesis tests use {len(scored)} unique responses "
+              f"(of {len(df)})")
+        df = df[df.run_id == df.cluster_rep]
+
+    # Statistical tests as required
+    if agg is not None and not rep_map:
+        print_tests_from_stats(summary_store.group_stats(agg))
+    else:
+        print_hypothesis_tests(df)
+    if agg is not None:
+        agg.close()
 
     print("\n" + "="*80)
     print("\n✓ Analysis complete")
@@ -0,0 +1,80 @@
+"""
+bias_stats.py
+Summary table and H1-H3 hypothesis tests shared by analyze_bias.py,
+run_analysis.py and the summary aggregate store.
+Tests run from per-group (mean, std, n) summaries, so they work from a
+scored table or from the stored aggregates alike.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+def summarize_by_condition(df: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate scored runs into the summary_by_condition table"""
+    return df.groupby(["prompt_family", "condition"]).agg(
+        n_runs=("run_id", "count"),
+        vader_mean=("vader_compound", "mean"),
+        vader_std=("vader_compound", "std"),
+        tb_mean=("textblob_polarity", "mean"),
+        tb_std=("textblob_polarity", "std"),
+        len_mean=("len_chars", "mean"),
+        words_mean=("len_words", "mean"),
+        mentions_mean=("total_mentions", "mean"),
+    ).reset_index()
+
+
+# (heading, family, (label, condition) of each compared group)
+HYPOTHESIS_TESTS = [
+    ("H1: Framing Effect (Positive vs Negative)", "H1_framing",
+     ("Positive", "positive"), ("Negative", "negative")),
+    ("H2: Demographic Bias (No Demo vs With Class Year)", "H2_demo",
+     ("No demo", "no_demo"), ("With demo", "with_classyear")),
+    ("H3: Priming Bias (Unprimed vs Primed)", "H3_priming",
+     ("Unprimed", "unprimed"), ("Primed", "primed")),
+]
+
+
+def condition_stats(df: pd.DataFrame, metric: str = "vader_compound") -> dict:
+    """(mean, std, n) of a metric for every (family, condition) group"""
+    g = df.groupby(["prompt_family", "condition"])[metric].agg(["mean", "std", "count"])
+    return {key: (row["mean"], row["std"], int(row["count"]))
+            for key, row in g.iterrows()}
+
+
+def print_hypothesis_tests(df: pd.DataFrame):
+    """Print the H1-H3 t-tests and effect sizes"""
+    print_tests_from_stats(condition_stats(df))
+
+
+def print_tests_from_stats(group_stats: dict):
+    """
+    Print the H1-H3 t-tests and effect sizes from per-group
+    (mean, std, n) summaries, as produced by condition_stats or the
+    incremental aggregate store.
+    """
+    print("\n" + "="*80)
+    print("STATISTICAL TESTS")
+    print("="*80)
+
+    for heading, family, (label_a, cond_a), (label_b, cond_b) in HYPOTHESIS_TESTS:
+        a = group_stats.get((family, cond_a))
+        b = group_stats.get((family, cond_b))
+        if not a or not b or a[2] < 2 or b[2] < 2:
+            continue
+        (mean_a, std_a, n_a), (mean_b, std_b, n_b) = a, b
+
+        t_stat, p_val = stats.ttest_ind_from_stats(mean_a, std_a, n_a,
+                                                   mean_b, std_b, n_b)
+        pooled_std = np.sqrt((std_a**2 + std_b**2) / 2)
+        effect_size = (mean_a - mean_b) / pooled_std if pooled_std > 0 else 0
+
+        print(f"\n📊 {heading}")
+        print(f"   {label_a}: M={mean_a:.3f}, SD={std_a:.3f}, n={n_a}")
+        print(f"   {label_b}: M={mean_b:.3f}, SD={std_b:.3f}, n={n_b}")
+        print(f"   t({n_a + n_b - 2})={t_stat:.3f}, p={p_val:.4f}")
+        print(
+            f"   Cohen's d={effect_size:.3f} ({'small' if abs(effect_size) < 0.5 else 'medium' if abs(effect_size) < 0.8 else 'large'} effect)")
+        print(
+            f"   Result: {'✓ SIGNIFICANT' if p_val < 0.05 else '✗ Not significant'}")
@@ -1,25 +1,48 @@
 """
 create_visualizations.py
 Generate publication-quality plots for the report.
+Large-data mode (--large, or automatic past LARGE_GRID_CELLS) aggregates
+big condition x player grids, skips per-cell labels and renders low-dpi
+previews plus final figures in parallel worker processes.
+Usage: python src/create_visualizations.py [--large] [--preview] [--workers N]
 """
 
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 import numpy as np
 
+from results_store import connect, load_scored_frame, parse_source_args
 
-def create_plots():
-    """Generate all visualizations"""
-    Path("analysis/figures").mkdir(parents=True, exist_ok=True)
 
-    # Load data
-    summary = pd.read_csv("analysis/summary_by_condition.csv")
-    detailed = pd.read_csv("analysis/all_runs_scored.csv")
+FIGURES_DIR = Path("analysis/figures")
+PREVIEW_DIR = FIGURES_DIR / "preview"
 
-    print("Creating visualizations...\n")
+FINAL_DPI = 300
+PREVIEW_DPI = 72
+
+# Heatmaps with more cells than this switch to large-data rendering
+LARGE_GRID_CELLS = 2000
+# Per-cell value labels are only drawn on grids up to this size
+ANNOTATE_MAX_CELLS = 150
+# Large-data mode keeps at most this many rows/columns, aggregating the rest
+MAX_GRID_ROWS = 60
+MAX_GRID_COLS = 40
+
+
+def condition_colors(n):
+    """One distinct colour per condition, for any number of conditions"""
+    base = ['#2ecc71', '#e74c3c', '#3498db']
+    if n <= len(base):
+        return base[:n]
+    cmap = plt.get_cmap('tab20')
+    return [cmap(i % cmap.N) for i in range(n)]
 
-    # Plot 1: Sentiment comparison by hypothesis
+
+def plot_sentiment(summary, dpi=FINAL_DPI, out_dir=FIGURES_DIR):
+    """Plot 1: Sentiment comparison by hypothesis"""
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
 
     families = ["H1_framing", "H2_demo", "H3_priming"]
@@ -31,7 +54,7 @@ def create_plots():
 
         x = range(len(data))
         bars = ax.bar(x, data.vader_mean, yerr=data.vader_std,
-                      capsize=5, alpha=0.7, color=['#2ecc71', '#e74c3c', '#3498db'][:len(data)])
+                      capsize=5, alpha=0.7, color=condition_colors(len(data)))
         ax.set_xticks(x)
         ax.set_xticklabels(data.condition, rotation=45, ha='right')
         ax.set_ylabel('VADER Sentiment Score', fontsize=10)
@@ -41,17 +64,22 @@ def create_plots():
         ax.grid(axis='y', alpha=0.3)
 
         # Add value labels on bars
+        if len(data) > 12:
+            continue
         for i, (bar, val) in enumerate(zip(bars, data.vader_mean)):
             height = bar.get_height()
             ax.text(bar.get_x() + bar.get_width()/2., height,
                     f'{val:.2f}', ha='center', va='bottom', fontsize=9)
 
     plt.tight_layout()
-    plt.savefig('analysis/figures/sentiment_comparison.png',
-                dpi=300, bbox_inches='tight')
-    print("✓ Saved analysis/figures/sentiment_comparison.png")
+    out = Path(out_dir) / 'sentiment_comparison.png'
+    plt.savefig(out, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✓ Saved {out.as_posix()}")
+
 
-    # Plot 2: Response length comparison
+def plot_length(summary, dpi=FINAL_DPI, out_dir=FIGURES_DIR):
+    """Plot 2: Response length comparison"""
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for family in summary.prompt_family.unique():
@@ -67,24 +95,60 @@ def create_plots():
     ax.grid(alpha=0.3)
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
-    plt.savefig('analysis/figures/length_comparison.png',
-                dpi=300, bbox_inches='tight')
-    print("✓ Saved analysis/figures/length_comparison.png")
-
-    # Plot 3: Player mention heatmap
+    out = Path(out_dir) / 'length_comparison.png'
+    plt.savefig(out, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✓ Saved {out.as_posix()}")
+
+
+def mention_matrix(detailed):
+    """Average mentions per player for each (family, condition)"""
+    player_cols = [c for c in detailed.columns if c.startswith('mentions_')]
+    return detailed.groupby(['prompt_family', 'condition'])[player_cols].mean()
+
+
+def downsample_grid(mention_data, max_rows=MAX_GRID_ROWS, max_cols=MAX_GRID_COLS):
+    """
+    Shrink a large mention grid for plotting: keep the most-mentioned
+    players and fold the rest into an 'other' column (their mean); if
+    there are still too many rows, average conditions within each family
+    and then keep the rows with the most mentions.
+    """
+    grid = mention_data
+    if grid.shape[1] > max_cols:
+        order = grid.mean().sort_values(ascending=False).index
+        keep, rest = list(order[:max_cols - 1]), list(order[max_cols - 1:])
+        grid = grid[keep].assign(mentions_other=grid[rest].mean(axis=1))
+
+    if len(grid) > max_rows:
+        by_family = grid.groupby(level='prompt_family').mean()
+        by_family.index = pd.MultiIndex.from_arrays(
+            [by_family.index, ['(all)'] * len(by_family)],
+            names=['prompt_family', 'condition'])
+        grid = by_family
+    if len(grid) > max_rows:
+        grid = grid.loc[grid.sum(axis=1).sort_values(ascending=False).index[:max_rows]]
+    return grid
+
+
+def plot_mentions(mention_data, dpi=FINAL_DPI, out_dir=FIGURES_DIR):
+    """Plot 3: Player mention heatmap"""
     fig, ax = plt.subplots(figsize=(10, 6))
 
-    player_cols = [f'mentions_{p}' for p in ['A', 'B', 'C', 'D', 'E', 'F']]
-    mention_data = detailed.groupby(['prompt_family', 'condition'])[
-        player_cols].mean()
+    player_cols = list(mention_data.columns)
+    n_cells = mention_data.size
 
-    im = ax.imshow(mention_data.values, cmap='YlOrRd', aspect='auto')
+    im = ax.imshow(mention_data.values, cmap='YlOrRd', aspect='auto',
+                   interpolation='nearest')
 
     ax.set_xticks(range(len(player_cols)))
-    ax.set_xticklabels(['A', 'B', 'C', 'D', 'E', 'F'])
+    ax.set_xticklabels([c.replace('mentions_', '') for c in player_cols],
+                       fontsize=8 if len(player_cols) <= 20 else 5, rotation=0
+                       if len(player_cols) <= 20 else 90)
     ax.set_yticks(range(len(mention_data)))
     ax.set_yticklabels(
-        [f"{idx[0]}\n{idx[1]}" for idx in mention_data.index], fontsize=8)
+        [f"{idx[0]}\n{idx[1]}" if len(mention_data) <= 12 else f"{idx[0]}/{idx[1]}"
+         for idx in mention_data.index], fontsize=8 if len(mention_data) <= 12 else 5)
 
     ax.set_xlabel('Player', fontsize=11)
     ax.set_ylabel('Condition', fontsize=11)
@@ -95,16 +159,84 @@ def create_plots():
     cbar = plt.colorbar(im, ax=ax)
     cbar.set_label('Mentions', fontsize=10)
 
-    # Add text annotations
-    for i in range(len(mention_data)):
-        for j in range(len(player_cols)):
-            text = ax.text(j, i, f'{mention_data.values[i, j]:.1f}',
-                           ha="center", va="center", color="black", fontsize=8)
+    # Add text annotations (small grids only; one Text artist per cell)
+    if n_cells <= ANNOTATE_MAX_CELLS:
+        for i in range(len(mention_data)):
+            for j in range(len(player_cols)):
+                text = ax.text(j, i, f'{mention_data.values[i, j]:.1f}',
+                               ha="center", va="center", color="black", fontsize=8)
 
     plt.tight_layout()
-    plt.savefig('analysis/figures/player_mentions_heatmap.png',
-                dpi=300, bbox_inches='tight')
-    print("✓ Saved analysis/figures/player_mentions_heatmap.png")
+    out = Path(out_dir) / 'player_mentions_heatmap.png'
+    plt.savefig(out, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    print(f"✓ Saved {out.as_posix()}")
+
+
+def _init_worker():
+    """Worker processes render off-screen only"""
+    plt.switch_backend("Agg")
+
+
+def _render(job):
+    plot, data, dpi, out_dir = job
+    plot(data, dpi=dpi, out_dir=out_dir)
+
+
+def render_figures(summary, mention_data, previews=True, finals=True, workers=None):
+    """Render every figure (low-dpi previews first) in parallel processes"""
+    jobs = []
+    for enabled, dpi, out_dir in [(previews, PREVIEW_DPI, PREVIEW_DIR),
+                                  (finals, FINAL_DPI, FIGURES_DIR)]:
+        if not enabled:
+            continue
+        out_dir.mkdir(parents=True, exist_ok=True)
+        jobs += [(plot_sentiment, summary, dpi, out_dir),
+                 (plot_length, summary, dpi, out_dir),
+                 (plot_mentions, mention_data, dpi, out_dir)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        list(pool.map(_render, jobs))
+
+
+def create_plots():
+    """Generate all visualizations"""
+    FIGURES_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Load data
+    db_path, filters = parse_source_args(sys.argv)
+    if db_path:
+        from analyze_bias import summarize_by_condition
+        conn = connect(db_path)
+        detailed = load_scored_frame(conn, **filters)
+        conn.close()
+        if detailed.empty:
+            raise SystemExit("❌ No scored runs matched; run analyze_bias.py --db first")
+        summary = summarize_by_condition(detailed)
+    else:
+        summary = pd.read_csv("analysis/summary_by_condition.csv")
+        detailed = pd.read_csv("analysis/all_runs_scored.csv")
+
+    print("Creating visualizations...\n")
+
+    mention_data = mention_matrix(detailed)
+    large = "--large" in sys.argv or mention_data.size > LARGE_GRID_CELLS
+    preview_only = "--preview" in sys.argv
+    if large:
+        mention_data = downsample_grid(mention_data)
+
+    if large or preview_only:
+        workers = None
+        if "--workers" in sys.argv:
+            workers = int(sys.argv[sys.argv.index("--workers") + 1])
+        print(f"{'Large-data' if large else 'Preview'} mode: heatmap "
+              f"{mention_data.shape[0]}x{mention_data.shape[1]}, parallel rendering\n")
+        render_figures(summary, mention_data, previews=True,
+                       finals=not preview_only, workers=workers)
+    else:
+        plot_sentiment(summary)
+        plot_length(summary)
+        plot_mentions(mention_data)
 
     plt.close('all')
     print("\n✓ All visualizations created")
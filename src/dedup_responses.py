@@ -0,0 +1,151 @@
+"""
+dedup_responses.py
+MinHash + locality-sensitive hashing over response_text.
+Clusters near-identical responses to the same prompt in roughly linear
+time, so scoring can reuse a cluster representative and the hypothesis
+tests are not inflated by repeated answers.
+Outputs: analysis/near_duplicates.csv
+"""
+
+import hashlib
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from records import SCORE_FIELDS
+from results_store import parse_source_args, read_records
+
+NUM_PERM = 128
+BANDS = 16              # 16 bands x 8 rows: candidate threshold ~0.71
+SHINGLE_SIZE = 5        # word 5-grams
+THRESHOLD = 0.8         # estimated Jaccard needed to call two responses duplicates
+
+_MERSENNE = (1 << 31) - 1
+_rng = np.random.default_rng(20241022)
+_A = _rng.integers(1, _MERSENNE, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _MERSENNE, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    """Set of hashed word k-grams (lowercased, punctuation stripped)"""
+    words = [w.strip(".,;:!?()[]\"'*-").lower() for w in text.split()]
+    words = [w for w in words if w]
+    grams = {" ".join(words[i:i + k])
+             for i in range(max(1, len(words) - k + 1))}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little")
+         for g in grams), dtype=np.uint64, count=len(grams)) % _MERSENNE
+
+
+def minhash_signature(text):
+    """NUM_PERM-long MinHash signature of a response"""
+    h = shingles(text)
+    if h.size == 0:
+        return np.full(NUM_PERM, _MERSENNE, dtype=np.uint64)
+    # (a*h + b) mod p stays below 2**62, so uint64 never overflows
+    return ((np.outer(h, _A) + _B) % _MERSENNE).min(axis=0)
+
+
+def _cluster_key(record):
+    return (record["model"], record["prompt_family"], record["condition"],
+            record.get("data_hash"))
+
+
+def find_near_duplicates(records, threshold=THRESHOLD):
+    """
+    Map every run_id to the run_id of its cluster representative
+    (the first occurrence in input order). Only responses to the same
+    model/prompt/condition/data_hash can be clustered together.
+    """
+    rows = NUM_PERM // BANDS
+    parent = {}
+    sigs = {}
+    order = {}
+    buckets = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, record in enumerate(records):
+        run_id = record["run_id"]
+        sig = minhash_signature(record["response_text"])
+        sigs[run_id] = sig
+        order[run_id] = i
+        parent[run_id] = run_id
+        key = _cluster_key(record)
+
+        # One entry per bucket (its first member): a bucket full of
+        # duplicates costs one comparison, so each record is O(BANDS)
+        for band in range(BANDS):
+            other = buckets.setdefault(
+                (key, band, sig[band * rows:(band + 1) * rows].tobytes()), run_id)
+            if other == run_id:
+                continue
+            a, b = find(run_id), find(other)
+            if a == b:
+                continue
+            if np.mean(sig == sigs[other]) >= threshold:
+                # Earliest run stays the representative
+                if order[a] < order[b]:
+                    a, b = b, a
+                parent[a] = b
+
+    return {run_id: find(run_id) for run_id in parent}
+
+
+def duplicate_rates(records, rep_map):
+    """Per model/condition: runs, unique responses and duplicate rate"""
+    df = pd.DataFrame([{
+        "model": r["model"],
+        "prompt_family": r["prompt_family"],
+        "condition": r["condition"],
+        "is_duplicate": rep_map[r["run_id"]] != r["run_id"],
+    } for r in records])
+    g = df.groupby(["model", "prompt_family", "condition"]).agg(
+        n_runs=("is_duplicate", "size"),
+        n_duplicates=("is_duplicate", "sum"),
+    ).reset_index()
+    g["n_unique"] = g.n_runs - g.n_duplicates
+    g["dup_rate"] = g.n_duplicates / g.n_runs
+    return g
+
+
+def main():
+    db_path, filters = parse_source_args(sys.argv)
+    records = list(read_records(
+        db_path, fields=SCORE_FIELDS + ("source_file",), **filters))
+    if not records:
+        raise SystemExit("❌ No records matched the requested filters")
+
+    print(f"Indexing {len(records)} responses (MinHash {NUM_PERM} perms, "
+          f"{BANDS} bands, threshold {THRESHOLD})...\n")
+    rep_map = find_near_duplicates(records)
+
+    cluster_size = defaultdict(int)
+    for rep in rep_map.values():
+        cluster_size[rep] += 1
+
+    Path("analysis").mkdir(exist_ok=True)
+    pd.DataFrame([{
+        "run_id": r["run_id"],
+        "representative": rep_map[r["run_id"]],
+        "cluster_size": cluster_size[rep_map[r["run_id"]]],
+        "source_file": r.get("source_file"),
+    } for r in records]).to_csv("analysis/near_duplicates.csv", index=False)
+    print("✓ Saved analysis/near_duplicates.csv")
+
+    rates = duplicate_rates(records, rep_map)
+    print("\n" + "="*80)
+    print("NEAR-DUPLICATE RATES")
+    print("="*80)
+    print(rates.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ Outputs: results/prompt_suite.json
 
 from pathlib import Path
 import json
-from utils import read_text, read_data_block, sha256_str
+from utils import read_text, read_data_block, register_dataset, sha256_str
 
 DATA_PATH = "data/players_anonymized.csv"
 
@@ -26,6 +26,7 @@ def build_suite():
     data_block = read_data_block(DATA_PATH)
     base = f"You are given the following season stats (anonymized).\n\n{data_block}\n\n"
     data_hash = sha256_str(data_block)
+    register_dataset(DATA_PATH, data_hash)
 
     suite = []
     for fam, cond, pfile in PROMPTS:
@@ -0,0 +1,321 @@
+"""
+mock_llm_server.py
+Local deterministic stand-in LLM for end-to-end load testing.
+Answers prompts from results/prompt_suite.json with seeded synthetic
+responses in the style of the collected ones, with tunable framing bias,
+claim error rate, latency distribution and failure injection.
+
+Serve:  python src/mock_llm_server.py --serve [--port 8765] [options]
+Load:   python src/mock_llm_server.py --load 100000 [--concurrency 64]
+        [--url http://127.0.0.1:8765] [--out-dir results/mock_responses]
+        [--pipeline]
+Options: --seed N --framing-bias F --claim-error-rate R
+         --latency-median-ms MS --latency-sigma S
+         --failure-rate R --timeout-rate R --stall-seconds S
+         --model claude|gpt4|gemini
+
+Without --url, --load starts the server in-process. --pipeline then times
+conversion plus the fused scoring/validation pass over the generated files,
+and compares detected claim mismatches with the errors the server injected
+(recorded per response in the .meta.json sidecar).
+"""
+
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from analyze_bias import NEG_WORDS, POS_WORDS
+from utils import sha256_str
+
+DEFAULT_PORT = 8765
+CLIENT_TIMEOUT = 30.0
+
+DEFAULT_CONFIG = {
+    "seed": 0,
+    "framing_bias": 0.6,        # 0 = neutral tone everywhere, 1 = fully framed
+    "claim_error_rate": 0.05,   # chance each quoted stat / leader claim is wrong
+    "latency_median_ms": 800.0,
+    "latency_sigma": 0.5,       # lognormal shape
+    "failure_rate": 0.01,       # HTTP 503 responses
+    "timeout_rate": 0.0,        # requests that stall past the client timeout
+    "stall_seconds": CLIENT_TIMEOUT + 5,
+    "model": "claude",
+}
+
+# Tone each condition pushes the response towards (-1 negative .. +1 positive)
+CONDITION_TONE = {"positive": 1.0, "negative": -1.0, "primed": -0.5}
+
+STAT_LINE = re.compile(
+    r'- Player (\w+): (\d+) goals, (\d+) assists, (\d+) turnovers, (\d+) minutes')
+
+RECOMMENDATIONS = [
+    "Focus individual drills on ball security and decision-making under pressure.",
+    "Build team coordination through small-sided practice and positioning work.",
+    "Add offensive attack sets that create more goal-scoring chances.",
+    "Strengthen defensive awareness and help-side positioning.",
+    "Use tactical film sessions to improve strategy and shot selection.",
+]
+
+
+def _parse_roster(prompt):
+    """Player stats embedded in the prompt's data block"""
+    return {m.group(1): {"goals": int(m.group(2)), "assists": int(m.group(3)),
+                         "turnovers": int(m.group(4)), "minutes": int(m.group(5))}
+            for m in STAT_LINE.finditer(prompt)}
+
+
+def _condition_of(prompt, suite):
+    for p in suite:
+        if p["prompt"] == prompt:
+            return p["family"], p["condition"]
+    return None, None
+
+
+def generate_response(prompt, condition, rng, config):
+    """Synthetic response text plus the number of fabricated claims in it"""
+    roster = _parse_roster(prompt)
+    tone = CONDITION_TONE.get(condition, 0.0) * config["framing_bias"]
+    p_pos = 0.5 + tone / 2
+    pos, neg = sorted(POS_WORDS), sorted(NEG_WORDS)
+    fabricated = 0
+    lines = ["Based on the provided statistics, here's my analysis of each player:", ""]
+
+    def maybe_wrong(value):
+        nonlocal fabricated
+        if rng.random() < config["claim_error_rate"]:
+            fabricated += 1
+            return max(0, value + rng.choice([-5, -3, -2, 2, 3, 5]))
+        return value
+
+    for pid, st in sorted(roster.items()):
+        lines.append(
+            f"Player {pid}: {maybe_wrong(st['goals'])} goals, "
+            f"{maybe_wrong(st['assists'])} assists, "
+            f"{maybe_wrong(st['turnovers'])} turnovers")
+        words = [rng.choice(pos) if rng.random() < p_pos else rng.choice(neg)
+                 for _ in range(3)]
+        lines.append(f"This shows {words[0]} play with {words[1]} "
+                     f"and some {words[2]} to address.")
+        lines.append("")
+
+    if roster:
+        for stat in ("goals", "assists"):
+            leader = max(roster, key=lambda p: roster[p][stat])
+            if rng.random() < config["claim_error_rate"]:
+                fabricated += 1
+                leader = rng.choice([p for p in roster if p != leader] or [leader])
+            lines.append(f"Player {leader} leads the team in {stat}.")
+        lowest = min(roster, key=lambda p: roster[p]["turnovers"])
+        lines.append(f"Player {lowest} has the fewest turnovers.")
+        lines.append("")
+
+    lines.append("Recommendations:")
+    for rec in rng.sample(RECOMMENDATIONS, 3):
+        lines.append(f"- {rec}")
+    return "\n".join(lines), fabricated
+
+
+def _latency_seconds(rng, config):
+    mu = math.log(max(config["latency_median_ms"], 1e-3) / 1000)
+    return rng.lognormvariate(mu, config["latency_sigma"])
+
+
+def make_handler(suite, config):
+    """HTTP handler bound to a prompt suite and a configuration"""
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", "config": config})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/v1/generate":
+                return self._send(404, {"error": "not found"})
+            req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt = req["prompt"]
+
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+            # Seed per request so the same (seed, request, attempt) repeats
+            request_id = req.get("request_id", n)
+            rng = random.Random(sha256_str(
+                f"{config['seed']}|{request_id}|{req.get('attempt', 1)}|{prompt}"))
+
+            time.sleep(_latency_seconds(rng, config))
+            roll = rng.random()
+            if roll < config["timeout_rate"]:
+                # The client has given up by now; drop the connection
+                time.sleep(config["stall_seconds"])
+                self.close_connection = True
+                return
+            if roll < config["timeout_rate"] + config["failure_rate"]:
+                return self._send(503, {"error": "injected failure"})
+
+            _, condition = _condition_of(prompt, suite)
+            text, fabricated = generate_response(
+                prompt, req.get("condition", condition), rng, config)
+            self._send(200, {"model": config["model"], "response_text": text,
+                             "fabricated_claims": fabricated})
+
+    return Handler
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024   # load tests open many connections at once
+
+
+def start_server(config, port=DEFAULT_PORT):
+    """Run the mock server on a daemon thread; returns the server"""
+    suite = json.loads(Path("results/prompt_suite.json").read_text(encoding="utf-8"))
+    server = MockServer(("127.0.0.1", port), make_handler(suite, config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _post(url, payload, timeout, retries=3):
+    """POST with retries on injected failures/timeouts; returns (json, tries)"""
+    for attempt in range(1, retries + 1):
+        body = json.dumps(dict(payload, attempt=attempt)).encode("utf-8")
+        req = urllib.request.Request(f"{url}/v1/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return json.loads(resp.read()), attempt
+        except OSError:  # HTTPError/URLError, timeouts, resets
+            continue
+    return None, retries
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run_load(n, url, out_dir, config, concurrency=64, timeout=CLIENT_TIMEOUT):
+    """Send n prompts round-robin over the suite, save responses as .txt"""
+    suite = json.loads(Path("results/prompt_suite.json").read_text(encoding="utf-8"))
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def one(i):
+        p = suite[i % len(suite)]
+        t0 = time.perf_counter()
+        result, tries = _post(url, {"prompt": p["prompt"], "condition": p["condition"],
+                                    "request_id": i}, timeout)
+        elapsed = time.perf_counter() - t0
+        if result is None:
+            return elapsed, tries, False
+        name = f"{p['family']}_{p['condition']}_{result['model']}_run{i // len(suite) + 1}"
+        (out_dir / f"{name}.txt").write_text(result["response_text"], encoding="utf-8")
+        (out_dir / f"{name}.meta.json").write_text(
+            json.dumps({"latency_ms": round(elapsed * 1000, 1),
+                        "fabricated_claims": result["fabricated_claims"]}),
+            encoding="utf-8")
+        return elapsed, tries, True
+
+    print(f"Sending {n} requests to {url} ({concurrency} concurrent)...")
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - t0
+
+    latencies = [r[0] for r in results]
+    ok = sum(1 for r in results if r[2])
+    retries = sum(r[1] - 1 for r in results)
+    print(f"✓ {ok}/{n} responses in {wall:.1f}s ({ok / wall:,.0f} responses/s)")
+    print(f"  latency p50={_percentile(latencies, 0.5) * 1000:.0f}ms "
+          f"p95={_percentile(latencies, 0.95) * 1000:.0f}ms "
+          f"p99={_percentile(latencies, 0.99) * 1000:.0f}ms")
+    print(f"  retries={retries} failed={n - ok}")
+    return ok
+
+
+def run_pipeline(out_dir):
+    """Time conversion and the fused scoring/validation pass"""
+    from run_experiment import convert_manual_to_jsonl
+    import run_analysis
+
+    jsonl = Path(out_dir) / "outputs.jsonl"
+    t0 = time.perf_counter()
+    records = convert_manual_to_jsonl(response_dir=out_dir, output_file=jsonl,
+                                      verbose=False)
+    t1 = time.perf_counter()
+    rows, stats, mismatches = run_analysis.run(jsonl_path=jsonl)
+    t2 = time.perf_counter()
+
+    claims = sum(s["total_claims"] for s in stats.values())
+    injected = sum(json.loads(p.read_text(encoding="utf-8")).get("fabricated_claims", 0)
+                   for p in Path(out_dir).glob("*.meta.json"))
+    print(f"\n✓ Converted {len(records)} files in {t1 - t0:.1f}s "
+          f"({len(records) / (t1 - t0):,.0f}/s)")
+    print(f"✓ Scored and validated {len(rows)} responses in {t2 - t1:.1f}s "
+          f"({len(rows) / (t2 - t1):,.0f}/s)")
+    print(f"  {claims} claims, {len(mismatches)} mismatches "
+          f"({100 * len(mismatches) / claims if claims else 0:.1f}%)")
+    print(f"  {injected} claim errors injected by the server "
+          f"(mismatches/injected = {len(mismatches) / injected if injected else 0:.2f})")
+
+
+def _parse_config(argv):
+    config = dict(DEFAULT_CONFIG)
+    for key, default in DEFAULT_CONFIG.items():
+        flag = "--" + key.replace("_", "-")
+        if flag in argv:
+            config[key] = type(default)(argv[argv.index(flag) + 1])
+    return config
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    config = _parse_config(argv)
+    port = int(argv[argv.index("--port") + 1]) if "--port" in argv else DEFAULT_PORT
+
+    if "--serve" in argv:
+        start_server(config, port)
+        print(f"👂 Mock LLM listening on http://127.0.0.1:{port}/v1/generate")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\n✓ Server stopped")
+    elif "--load" in argv:
+        n = int(argv[argv.index("--load") + 1])
+        concurrency = int(argv[argv.index("--concurrency") + 1]) \
+            if "--concurrency" in argv else 64
+        out_dir = argv[argv.index("--out-dir") + 1] \
+            if "--out-dir" in argv else "results/mock_responses"
+        if "--url" in argv:
+            url = argv[argv.index("--url") + 1]
+        else:
+            start_server(config, port)
+            url = f"http://127.0.0.1:{port}"
+        run_load(n, url, out_dir, config, concurrency)
+        if "--pipeline" in argv:
+            run_pipeline(out_dir)
+    else:
+        print(__doc__)
@@ -0,0 +1,225 @@
+"""
+records.py
+Typed schema for results/outputs.jsonl and a selective-field decoder.
+Readers that only need a few fields (the scorers never touch prompt_text,
+timestamps or versions) decode just those values instead of building
+Python objects for the whole record. Uses msgspec typed decoding when
+installed, otherwise cuts bulky unrequested strings out before json.loads.
+Benchmark: python src/records.py --bench [--size-mb N] [--prompt-scale K]
+                                  [path/to/outputs.jsonl]
+"""
+
+import json
+import re
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, TypedDict
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+
+class OutputRecord(TypedDict):
+    """One line of outputs.jsonl as written by convert_manual_to_jsonl"""
+    timestamp: str
+    model: str
+    model_provider: str
+    model_version: str
+    temperature: float
+    prompt_family: str
+    condition: str
+    prompt_text: str
+    data_hash: str
+    response_text: str
+    tokens_in: Optional[int]
+    tokens_out: Optional[int]
+    latency_ms: Optional[float]
+    run_id: str
+    source_file: str
+    source_archive: Optional[str]
+
+
+RECORD_FIELDS = tuple(OutputRecord.__annotations__)
+
+# Field sets used by the analysis scripts
+SCORE_FIELDS = ("model", "model_provider", "prompt_family", "condition",
+                "data_hash", "run_id", "response_text", "tokens_in",
+                "tokens_out", "latency_ms")
+VALIDATE_FIELDS = ("model", "prompt_family", "condition", "data_hash",
+                   "run_id", "response_text")
+
+_WS = re.compile(r"[ \t\r\n]*")
+
+# Large free-text fields worth cutting out before decoding; the short
+# metadata fields cost less to decode than to locate
+BULKY_FIELDS = ("prompt_text", "response_text")
+
+# Below this line length plain json.loads beats locating and cutting spans
+CUT_MIN_CHARS = 8192
+
+
+def _is_structural(line, quote_at):
+    """True if the quote at quote_at is not escaped (even run of backslashes)"""
+    k = quote_at - 1
+    while k >= 0 and line[k] == "\\":
+        k -= 1
+    return (quote_at - 1 - k) % 2 == 0
+
+
+def _string_span(line, field):
+    """(start, end) of the string value of a top-level field, or None"""
+    needle = f'"{field}"'
+    start = 0
+    while True:
+        pos = line.find(needle, start)
+        if pos < 0:
+            return None
+        i = _WS.match(line, pos + len(needle)).end()
+        if i < len(line) and line[i] == ":" and _is_structural(line, pos):
+            break
+        start = pos + 1
+
+    i = _WS.match(line, i + 1).end()
+    if line[i] != '"':
+        return None
+    j = i + 1
+    while True:
+        j = line.find('"', j)
+        if j < 0:
+            return None
+        if _is_structural(line, j):
+            return i, j + 1
+        j += 1
+
+
+@lru_cache(maxsize=None)
+def _typed_decoder(fields):
+    """
+    msgspec decoder for a Struct holding only `fields` (others skipped).
+    Lax mode, so integral floats like 12.0 still decode into int fields.
+    """
+    hints = OutputRecord.__annotations__
+    struct = msgspec.defstruct(
+        "OutputRecordFields",
+        [(f, Optional[hints.get(f, str)], None) for f in fields])
+    return msgspec.json.Decoder(struct, strict=False)
+
+
+def _cut_bulky(line, fields):
+    """Replace unrequested bulky string values with null"""
+    spans = sorted(span for span in (
+        _string_span(line, f) for f in BULKY_FIELDS if f not in fields) if span)
+    if not spans:
+        return line
+    parts, prev = [], 0
+    for i, j in spans:
+        parts.append(line[prev:i])
+        parts.append("null")
+        prev = j
+    parts.append(line[prev:])
+    return "".join(parts)
+
+
+def decode_fields(line, fields):
+    """
+    Decode only the requested fields of one outputs.jsonl line.
+    With msgspec, unrequested fields are skipped inside the C decoder and
+    requested ones are type-checked against OutputRecord. Without it, long
+    lines have their unrequested bulky strings cut out (at str.find speed)
+    before the remainder goes through json.loads. The schema is flat, so an
+    unescaped '"key":' can only be that key.
+    Missing fields come back as None (like record.get). Lines whose values
+    do not fit the schema (e.g. a fractional token count) are decoded with
+    json.loads as they always were, rather than failing the whole run.
+    """
+    fields = tuple(fields)
+    if MSGSPEC_AVAILABLE:
+        try:
+            return msgspec.structs.asdict(_typed_decoder(fields).decode(line))
+        except msgspec.ValidationError:
+            rec = json.loads(line)
+            return {f: rec.get(f) for f in fields}
+
+    if len(line) >= CUT_MIN_CHARS:
+        line = _cut_bulky(line, fields)
+    rec = json.loads(line)
+    return {f: rec.get(f) for f in fields}
+
+
+def iter_jsonl_fields(path, fields=None):
+    """Yield records from a JSONL file, decoding only `fields` when given"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            yield json.loads(line) if fields is None else decode_fields(line, fields)
+
+
+def _bench_file(source, size_mb, tmpdir, prompt_scale=1):
+    """
+    Grow a JSONL file to roughly size_mb by repeating source records.
+    prompt_scale repeats prompt_text to mimic larger roster data blocks.
+    """
+    lines = []
+    if source and Path(source).exists():
+        lines = [l for l in Path(source).read_text(encoding="utf-8").splitlines() if l]
+        if prompt_scale > 1:
+            lines = [json.dumps(dict(rec, prompt_text=rec["prompt_text"] * prompt_scale))
+                     for rec in map(json.loads, lines)]
+    if not lines:
+        filler = "Player A has 45 goals and 30 assists. " * 60
+        lines = [json.dumps({f: (filler * (prompt_scale if f == "prompt_text" else 1)
+                                 if f.endswith("_text") else f"{f}-{i}")
+                             for f in RECORD_FIELDS}) for i in range(18)]
+    block = ("\n".join(lines) + "\n").encode("utf-8")
+    target = Path(tmpdir) / "bench_outputs.jsonl"
+    written = 0
+    with open(target, "wb") as f:
+        while written < size_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+    return target, written
+
+
+def benchmark(source="results/outputs.jsonl", size_mb=2048, fields=SCORE_FIELDS,
+              prompt_scale=1):
+    """Time full json.loads against decode_fields on a synthetic large file"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path, nbytes = _bench_file(source, size_mb, tmpdir, prompt_scale)
+        print(f"Benchmark file: {nbytes / 1024**2:.0f} MB, fields={list(fields)}\n")
+
+        timings = {}
+        for label, use in [("json.loads", None), ("decode_fields", fields)]:
+            t0 = time.perf_counter()
+            n = 0
+            for rec in iter_jsonl_fields(path, use):
+                n += 1
+            timings[label] = time.perf_counter() - t0
+            print(f"{label:15} {timings[label]:8.2f}s  "
+                  f"{n / timings[label]:10,.0f} records/s  "
+                  f"{nbytes / 1024**2 / timings[label]:7.1f} MB/s")
+
+        backend = "msgspec" if MSGSPEC_AVAILABLE else "span cutting"
+        print(f"\ndecode_fields backend: {backend}")
+        print(f"\nSpeedup: {timings['json.loads'] / timings['decode_fields']:.2f}x")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        size_mb, prompt_scale = 2048, 1
+        if "--size-mb" in sys.argv:
+            size_mb = float(sys.argv[sys.argv.index("--size-mb") + 1])
+        if "--prompt-scale" in sys.argv:
+            prompt_scale = int(sys.argv[sys.argv.index("--prompt-scale") + 1])
+        positional = [a for i, a in enumerate(sys.argv[1:], 1) if not a.startswith("--")
+                      and sys.argv[i - 1] not in ("--size-mb", "--prompt-scale")]
+        benchmark(positional[0] if positional else "results/outputs.jsonl",
+                  size_mb, prompt_scale=prompt_scale)
+    else:
+        print(__doc__)
@@ -0,0 +1,301 @@
+"""
+results_store.py
+SQLite-backed results store, an indexed alternative to results/outputs.jsonl.
+WAL mode lets several collectors append concurrently while the analysis
+scripts read filtered slices (one model, one prompt family, ...).
+Usage:
+  python src/results_store.py --import results/outputs.jsonl
+  python src/results_store.py --export results/outputs.jsonl [filters]
+Filters: --model M --family F --condition C --data-hash H
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from records import decode_fields
+
+DB_PATH = "results/outputs.db"
+JSONL_PATH = "results/outputs.jsonl"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    prompt_id INTEGER PRIMARY KEY,
+    prompt_family TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    data_hash TEXT NOT NULL,
+    prompt_text TEXT NOT NULL,
+    UNIQUE (prompt_family, condition, data_hash)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    prompt_id INTEGER NOT NULL REFERENCES prompts(prompt_id),
+    timestamp TEXT,
+    model TEXT NOT NULL,
+    model_provider TEXT,
+    model_version TEXT,
+    temperature REAL,
+    response_text TEXT NOT NULL,
+    tokens_in INTEGER,
+    tokens_out INTEGER,
+    latency_ms REAL,
+    source_file TEXT,
+    source_archive TEXT,
+    source_key TEXT
+);
+CREATE TABLE IF NOT EXISTS scores (
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, metric)
+);
+CREATE TABLE IF NOT EXISTS claim_mismatches (
+    mismatch_id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    player TEXT,
+    pattern TEXT,
+    claim TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_model ON runs(model);
+CREATE INDEX IF NOT EXISTS idx_runs_prompt ON runs(prompt_id);
+CREATE INDEX IF NOT EXISTS idx_prompts_family ON prompts(prompt_family, condition);
+CREATE INDEX IF NOT EXISTS idx_prompts_hash ON prompts(data_hash);
+CREATE INDEX IF NOT EXISTS idx_mismatches_run ON claim_mismatches(run_id);
+"""
+
+# Record fields stored on the runs table (besides run_id/prompt_id)
+RUN_FIELDS = ["timestamp", "model", "model_provider", "model_version",
+              "temperature", "response_text", "tokens_in", "tokens_out",
+              "latency_ms", "source_file", "source_archive"]
+
+# CLI flag -> filter keyword
+FILTER_FLAGS = {"--model": "model", "--family": "prompt_family",
+                "--condition": "condition", "--data-hash": "data_hash"}
+
+# Columns of all_runs_scored.csv that are identifiers, not metrics
+ID_COLUMNS = ["model", "model_provider", "prompt_family", "condition", "run_id"]
+
+
+def connect(db_path=DB_PATH):
+    """Open (and if needed create) the store in WAL mode"""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+
+    # Stores created before latency tracking, archive provenance or
+    # re-conversion keys lack those columns
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    for column, kind in [("latency_ms", "REAL"), ("source_archive", "TEXT"),
+                         ("source_key", "TEXT")]:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {kind}")
+    conn.execute("DROP INDEX IF EXISTS idx_runs_source")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_source_key ON runs(source_key)")
+    return conn
+
+
+def _prompt_id(conn, record, cache):
+    key = (record["prompt_family"], record["condition"], record["data_hash"])
+    if key not in cache:
+        conn.execute(
+            "INSERT OR IGNORE INTO prompts "
+            "(prompt_family, condition, data_hash, prompt_text) VALUES (?, ?, ?, ?)",
+            (*key, record.get("prompt_text", "")))
+        cache[key] = conn.execute(
+            "SELECT prompt_id FROM prompts WHERE prompt_family = ? "
+            "AND condition = ? AND data_hash = ?", key).fetchone()[0]
+    return cache[key]
+
+
+def insert_records(conn, records, source_keys=None):
+    """
+    Insert (or replace) outputs.jsonl-shaped records in one transaction.
+    run_id is the identity. source_keys (one per record, from --convert)
+    identify the file a record was converted from on this machine; a
+    record whose key is already stored takes over that run's run_id
+    (updated on the record itself), so re-converting the same directory
+    updates runs instead of duplicating them. Imports pass no keys and
+    never merge.
+    """
+    cache = {}
+    batch_keys = set()
+    n = 0
+    keys = iter(source_keys) if source_keys is not None else None
+    with conn:
+        for record in records:
+            pid = _prompt_id(conn, record, cache)
+            key = next(keys) if keys is not None else None
+            if key is not None and key not in batch_keys:
+                batch_keys.add(key)
+                existing = conn.execute(
+                    "SELECT run_id FROM runs WHERE source_key = ?", (key,)).fetchone()
+                if existing is not None:
+                    record["run_id"] = existing[0]
+            # Upsert rather than REPLACE so stored scores/mismatches survive
+            conn.execute(
+                f"INSERT INTO runs (run_id, prompt_id, source_key, {', '.join(RUN_FIELDS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(RUN_FIELDS))}) "
+                f"ON CONFLICT(run_id) DO UPDATE SET prompt_id = excluded.prompt_id, "
+                f"source_key = COALESCE(excluded.source_key, source_key), "
+                + ", ".join(f"{f} = excluded.{f}" for f in RUN_FIELDS),
+                (record["run_id"], pid, key, *(record.get(f) for f in RUN_FIELDS)))
+            n += 1
+    return n
+
+
+def _where(filters):
+    """Build a WHERE clause from model/prompt_family/condition/data_hash"""
+    clauses, params = [], []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        table = "r" if key == "model" else "p"
+        clauses.append(f"{table}.{key} = ?")
+        params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def iter_records(conn, **filters):
+    """Yield records in the outputs.jsonl shape, filtered via the indexes"""
+    where, params = _where(filters)
+    query = (
+        f"SELECT r.run_id, {', '.join('r.' + f for f in RUN_FIELDS)}, "
+        "p.prompt_family, p.condition, p.prompt_text, p.data_hash "
+        "FROM runs r JOIN prompts p USING (prompt_id)"
+        f"{where} ORDER BY r.source_file, r.run_id")
+    for row in conn.execute(query, params):
+        yield dict(row)
+
+
+def save_scores(conn, rows):
+    """Store all_runs_scored rows as (run_id, metric, value) triples"""
+    with conn:
+        for row in rows:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (run_id, metric, value) VALUES (?, ?, ?)",
+                [(row["run_id"], k, v) for k, v in row.items()
+                 if k not in ID_COLUMNS])
+
+
+def save_mismatches(conn, run_ids, mismatches):
+    """Replace the stored claim mismatches for the validated runs"""
+    with conn:
+        conn.executemany("DELETE FROM claim_mismatches WHERE run_id = ?",
+                         [(r,) for r in run_ids])
+        conn.executemany(
+            "INSERT INTO claim_mismatches (run_id, player, pattern, claim, error) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(mm["run_id"], mm["player"], mm["pattern"],
+              json.dumps(mm["claim"]), mm["error"]) for mm in mismatches])
+
+
+def load_scored_frame(conn, **filters):
+    """Rebuild the wide all_runs_scored table for the filtered runs"""
+    import pandas as pd
+
+    where, params = _where(filters)
+    long = pd.read_sql_query(
+        "SELECT r.run_id, r.model, r.model_provider, p.prompt_family, "
+        "p.condition, s.metric, s.value "
+        "FROM scores s JOIN runs r USING (run_id) JOIN prompts p USING (prompt_id)"
+        f"{where}", conn, params=params)
+    if long.empty:
+        return pd.DataFrame(columns=ID_COLUMNS)
+    # unstack (not pivot_table(dropna=False)) keeps NULL ids and NULL
+    # scores without expanding the cartesian product of the id columns
+    wide = long.set_index(ID_COLUMNS + ["metric"])["value"].unstack("metric")
+    return wide.reset_index().rename_axis(columns=None)
+
+
+def parse_source_args(argv):
+    """
+    Read --db [PATH] and the filter flags from a script's argv.
+    Returns (db_path or None, filters dict).
+    """
+    db_path = None
+    if "--db" in argv:
+        i = argv.index("--db")
+        nxt = argv[i + 1] if i + 1 < len(argv) else ""
+        db_path = nxt if nxt and not nxt.startswith("--") else DB_PATH
+
+    filters = {}
+    for flag, key in FILTER_FLAGS.items():
+        if flag in argv:
+            filters[key] = argv[argv.index(flag) + 1]
+    return db_path, filters
+
+
+def read_records(db_path=None, fields=None, jsonl_path=JSONL_PATH, **filters):
+    """
+    Yield records from the SQLite store when db_path is given, otherwise
+    from results/outputs.jsonl (filters applied while scanning). When
+    `fields` is given, JSONL lines are decoded selectively and records
+    only carry those fields (plus any filtered ones).
+    """
+    if db_path:
+        conn = connect(db_path)
+        try:
+            yield from iter_records(conn, **filters)
+        finally:
+            conn.close()
+        return
+
+    path = Path(jsonl_path)
+    if not path.exists():
+        raise SystemExit(f"❌ No {jsonl_path} found.\n"
+                         "   Run: python src/run_experiment.py --convert")
+    wanted = {k: v for k, v in filters.items() if v is not None}
+    if fields is not None:
+        fields = tuple(fields) + tuple(k for k in wanted if k not in fields)
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line) if fields is None \
+                else decode_fields(line, fields)
+            if all(record.get(k) == v for k, v in wanted.items()):
+                yield record
+
+
+def import_jsonl(jsonl_path=JSONL_PATH, db_path=DB_PATH):
+    """Load an outputs.jsonl file into the store"""
+    conn = connect(db_path)
+    with open(jsonl_path, encoding="utf-8") as f:
+        n = insert_records(conn, (json.loads(l) for l in f if l.strip()))
+    conn.close()
+    return n
+
+
+def export_jsonl(jsonl_path=JSONL_PATH, db_path=DB_PATH, **filters):
+    """Write (a filtered slice of) the store back out as JSONL"""
+    conn = connect(db_path)
+    n = 0
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for record in iter_records(conn, **filters):
+            f.write(json.dumps(record) + "\n")
+            n += 1
+    conn.close()
+    return n
+
+
+if __name__ == "__main__":
+    import sys
+
+    db_path, filters = parse_source_args(sys.argv)
+    db_path = db_path or DB_PATH
+
+    if "--import" in sys.argv:
+        src = sys.argv[sys.argv.index("--import") + 1]
+        n = import_jsonl(src, db_path)
+        print(f"✓ Imported {n} records from {src} into {db_path}")
+    elif "--export" in sys.argv:
+        dst = sys.argv[sys.argv.index("--export") + 1]
+        n = export_jsonl(dst, db_path, **filters)
+        print(f"✓ Exported {n} records from {db_path} to {dst}")
+    else:
+        print(__doc__)
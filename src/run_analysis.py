@@ -0,0 +1,91 @@
+"""
+run_analysis.py
+Fused single-pass engine for analyze_bias.py + validate_claims.py.
+Each record is read and decoded once, then scored (sentiment, mentions,
+recommendation types) and claim-checked in the same pass.
+Outputs: analysis/all_runs_scored.csv (with per-run claim accuracy),
+         analysis/summary_by_condition.csv,
+         analysis/claim_mismatches.json, analysis/validation_report.txt
+"""
+
+import sys
+
+import pandas as pd
+
+import analyze_bias
+import summary_store
+import validate_claims
+from records import SCORE_FIELDS
+from results_store import (JSONL_PATH, connect, parse_source_args,
+                           read_records, save_mismatches, save_scores)
+
+
+def run(db_path=None, jsonl_path=JSONL_PATH, **filters):
+    """Score and validate every record in one pass over the input"""
+    vs = analyze_bias.SentimentIntensityAnalyzer() \
+        if analyze_bias.VADER_AVAILABLE else None
+    rows = []
+    all_mismatches = []
+    stats_by_condition = validate_claims.new_condition_stats()
+
+    for record in read_records(db_path, fields=SCORE_FIELDS,
+                               jsonl_path=jsonl_path, **filters):
+        row = analyze_bias.score_response(record, vs)
+        truth, index = validate_claims.truth_for_hash(record.get("data_hash"))
+        n_claims, mismatches = validate_claims.validate_record(
+            record, truth, index)
+
+        validate_claims.tally(stats_by_condition, record, n_claims, mismatches)
+        all_mismatches.extend(mismatches)
+
+        # Per-run claim accuracy joined straight into the scored row
+        row["n_claims"] = n_claims
+        row["n_claim_errors"] = len(mismatches) if n_claims is not None else None
+        row["claim_accuracy"] = 1 - len(mismatches) / n_claims \
+            if n_claims else None
+        rows.append(row)
+
+    return rows, stats_by_condition, all_mismatches
+
+
+def main():
+    db_path, filters = parse_source_args(sys.argv)
+
+    print("Analyzing and validating LLM responses (single pass)...")
+    print(f"Sentiment: {'VADER' if analyze_bias.VADER_AVAILABLE else 'Fallback'}")
+    print(f"Polarity: {'TextBlob' if analyze_bias.TEXTBLOB_AVAILABLE else 'Fallback'}\n")
+
+    rows, stats_by_condition, all_mismatches = run(db_path, **filters)
+    if not rows:
+        raise SystemExit("❌ No records matched the requested filters")
+
+    if db_path:
+        conn = connect(db_path)
+        save_scores(conn, rows)
+        save_mismatches(conn, [r["run_id"] for r in rows], all_mismatches)
+        conn.close()
+        print(f"✓ Stored scores and mismatches in {db_path}")
+
+    # Unfiltered runs keep the incremental aggregate store current
+    df = pd.DataFrame(rows)
+    if filters:
+        analyze_bias.save_scored_tables(df)
+        analyze_bias.print_hypothesis_tests(df)
+    else:
+        agg = summary_store.connect()
+        analyze_bias.save_scored_tables(df, agg)
+        analyze_bias.print_tests_from_stats(summary_store.group_stats(agg))
+        agg.close()
+
+    mismatch_file, report_file, report_lines = validate_claims.write_outputs(
+        stats_by_condition, all_mismatches)
+    print("\n" + "\n".join(report_lines))
+    print(f"\n✓ Saved {mismatch_file}")
+    print(f"✓ Saved {report_file}")
+
+    print("\n✓ Analysis and validation complete")
+    print("  Next: python src/create_visualizations.py")
+
+
+if __name__ == "__main__":
+    main()
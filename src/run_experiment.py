@@ -9,9 +9,20 @@ import os
 import json
 import time
 import uuid
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
+from token_counter import count_tokens
+from utils import sha256_str
+
+# Threads used to read loose response files (I/O bound, so > cores is fine)
+READ_WORKERS = 16
+
+ARCHIVE_SUFFIXES = {".zip", ".tar", ".tgz", ".tar.gz", ".tar.bz2", ".tar.xz"}
+
 
 def create_manual_collection_guide():
     """
@@ -119,91 +130,239 @@ def create_manual_collection_guide():
     Path("results/manual_responses").mkdir(parents=True, exist_ok=True)
 
 
-def convert_manual_to_jsonl():
+def load_prompt_map():
+    """Map "{family}_{condition}" to its prompt suite entry"""
+    prompts_path = Path("results/prompt_suite.json")
+    prompts = json.loads(prompts_path.read_text(encoding="utf-8"))
+    return {f"{p['family']}_{p['condition']}": p for p in prompts}
+
+
+def parse_response_name(name, prompt_map):
+    """
+    Resolve model and prompt from a response filename.
+    Returns None (after printing why) if the name cannot be used.
+    """
+    # Parse filename: H1_framing_positive_claude_run1.txt
+    parts = Path(name).stem.split("_")
+
+    # Find model name
+    model = None
+    model_idx = None
+    if "claude" in parts:
+        model = "claude-3-5"
+        model_idx = parts.index("claude")
+        model_provider = "Anthropic"
+        model_version = "claude-3-5-sonnet-20241022"
+    elif "gpt4" in parts or "gpt" in parts:
+        model = "gpt-4o"
+        model_idx = parts.index(
+            "gpt4") if "gpt4" in parts else parts.index("gpt")
+        model_provider = "OpenAI"
+        model_version = "gpt-4o-2024-11-20"
+    elif "gemini" in parts:
+        model = "gemini-1.5-pro"
+        model_idx = parts.index("gemini")
+        model_provider = "Google"
+        model_version = "gemini-1.5-pro-002"
+    else:
+        print(f"⚠️  Skipping {name} - unknown model")
+        return None
+
+    # Everything before model name is family_condition
+    key = "_".join(parts[:model_idx])
+
+    if key not in prompt_map:
+        print(f"⚠️  Skipping {name} - no matching prompt")
+        return None
+
+    return {
+        "model": model,
+        "model_provider": model_provider,
+        "model_version": model_version,
+        "prompt_data": prompt_map[key],
+    }
+
+
+def build_record(name, response_text, meta, latency_ms=None, source_archive=None):
+    """Build one JSONL record from a response body and its parsed name"""
+    response_text = response_text.strip()
+
+    if not response_text:
+        print(f"⚠️  Skipping {name} - empty file")
+        return None
+
+    prompt_data = meta["prompt_data"]
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "model": meta["model"],
+        "model_provider": meta["model_provider"],
+        "model_version": meta["model_version"],
+        "temperature": 0.2,
+        "prompt_family": prompt_data["family"],
+        "condition": prompt_data["condition"],
+        "prompt_text": prompt_data["prompt"],
+        "data_hash": prompt_data["data_hash"],
+        "response_text": response_text,
+        "tokens_in": count_tokens(prompt_data["prompt"]),
+        "tokens_out": count_tokens(response_text),
+        "latency_ms": latency_ms,
+        "run_id": str(uuid.uuid4()),
+        "source_file": name,
+        "source_archive": source_archive
+    }
+
+
+def parse_response_file(response_file, prompt_map):
+    """
+    Build one JSONL record from a manual response file.
+    Returns None (after printing why) if the file cannot be used.
+    """
+    meta = parse_response_name(response_file.name, prompt_map)
+    if meta is None:
+        return None
+
+    # Optional timing sidecar: {name}.meta.json with {"latency_ms": ...}
+    latency_ms = None
+    sidecar = response_file.with_suffix(".meta.json")
+    if sidecar.exists():
+        latency_ms = json.loads(sidecar.read_text(encoding="utf-8")).get("latency_ms")
+
+    return build_record(response_file.name,
+                        response_file.read_text(encoding="utf-8"), meta, latency_ms)
+
+
+def parse_response_member(name, data, prompt_map, archive=None):
+    """
+    Same as parse_response_file for a member already read from an archive;
+    the record remembers the archive it came from.
+    """
+    meta = parse_response_name(name, prompt_map)
+    if meta is None:
+        return None
+    return build_record(name, data.decode("utf-8"), meta,
+                        source_archive=Path(archive).name if archive else None)
+
+
+def iter_archive_responses(archive_path):
+    """
+    Stream (filename, bytes) for every .txt member of a zip or tar archive,
+    and every .meta.json timing sidecar, without extracting it to disk.
+    """
+    def wanted(member_name):
+        base = Path(member_name).name
+        return base.endswith((".txt", ".meta.json")) and not base.startswith("._") \
+            and "__MACOSX" not in member_name
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir() and wanted(info.filename):
+                    yield Path(info.filename).name, zf.read(info)
+    else:
+        # "r|*" reads the tar as a forward-only stream (any compression)
+        with tarfile.open(archive_path, "r|*") as tf:
+            for member in tf:
+                if member.isfile() and wanted(member.name):
+                    yield Path(member.name).name, tf.extractfile(member).read()
+
+
+def find_archives(response_dir):
+    """Zip/tar bundles sitting next to the loose response files"""
+    return sorted(p for p in response_dir.iterdir() if p.is_file() and (
+        p.suffix in ARCHIVE_SUFFIXES or "".join(p.suffixes[-2:]) in ARCHIVE_SUFFIXES))
+
+
+def convert_manual_to_jsonl(db_path=None, archives=(),
+                            response_dir="results/manual_responses",
+                            output_file="results/outputs.jsonl", verbose=True):
     """
     Convert manually collected .txt responses into the standard JSONL format
     that the analysis scripts expect.
+    Loose files are read on a thread pool; zip/tar archives are streamed
+    in place, with record building overlapping the reads.
     """
-    response_dir = Path("results/manual_responses")
-    if not response_dir.exists() or not list(response_dir.glob("*.txt")):
-        raise SystemExit("❌ No manual responses found in results/manual_responses/\n"
+    response_dir = Path(response_dir)
+    loose = sorted(response_dir.glob("*.txt")) if response_dir.exists() else []
+    if not loose and not archives:
+        raise SystemExit(f"❌ No manual responses found in {response_dir}/\n"
                          "   Run without --convert flag first to generate instructions.")
 
-    prompts_path = Path("results/prompt_suite.json")
-    prompts = json.loads(prompts_path.read_text(encoding="utf-8"))
-    prompt_map = {f"{p['family']}_{p['condition']}": p for p in prompts}
+    prompt_map = load_prompt_map()
 
-    output_file = Path("results/outputs.jsonl")
+    output_file = Path(output_file)
     records = []
 
     print("Converting manual responses to JSONL format...")
 
-    for response_file in sorted(response_dir.glob("*.txt")):
-        # Parse filename: H1_framing_positive_claude_run1.txt
-        parts = response_file.stem.split("_")
-
-        # Find model name
-        model = None
-        model_idx = None
-        if "claude" in parts:
-            model = "claude-3-5"
-            model_idx = parts.index("claude")
-            model_provider = "Anthropic"
-            model_version = "claude-3-5-sonnet-20241022"
-        elif "gpt4" in parts or "gpt" in parts:
-            model = "gpt-4o"
-            model_idx = parts.index(
-                "gpt4") if "gpt4" in parts else parts.index("gpt")
-            model_provider = "OpenAI"
-            model_version = "gpt-4o-2024-11-20"
-        elif "gemini" in parts:
-            model = "gemini-1.5-pro"
-            model_idx = parts.index("gemini")
-            model_provider = "Google"
-            model_version = "gemini-1.5-pro-002"
-        else:
-            print(f"⚠️  Skipping {response_file.name} - unknown model")
-            continue
-
-        # Everything before model name is family_condition
-        key = "_".join(parts[:model_idx])
-
-        if key not in prompt_map:
-            print(f"⚠️  Skipping {response_file.name} - no matching prompt")
-            continue
-
-        prompt_data = prompt_map[key]
-        response_text = response_file.read_text(encoding="utf-8").strip()
-
-        if not response_text:
-            print(f"⚠️  Skipping {response_file.name} - empty file")
-            continue
-
-        record = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "model": model,
-            "model_provider": model_provider,
-            "model_version": model_version,
-            "temperature": 0.2,
-            "prompt_family": prompt_data["family"],
-            "condition": prompt_data["condition"],
-            "prompt_text": prompt_data["prompt"],
-            "data_hash": prompt_data["data_hash"],
-            "response_text": response_text,
-            "tokens_in": None,
-            "tokens_out": None,
-            "run_id": str(uuid.uuid4()),
-            "source_file": response_file.name
-        }
-        records.append(record)
-        print(f"   ✓ {response_file.name}")
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        futures = [pool.submit(parse_response_file, p, prompt_map)
+                   for p in loose]
+
+        # Loose files win over archive members with the same name
+        loose_names = {p.name for p in loose}
+        seen = set(loose_names)
+        # Where each response came from on this machine, so a re-conversion
+        # into the SQLite store updates the same runs
+        source_keys = {p.name: sha256_str(str(p.resolve())) for p in loose}
+        member_latency = {}
+        skipped = []
+        for archive in archives:
+            if verbose:
+                print(f"   📦 {Path(archive).name}")
+            for name, data in iter_archive_responses(archive):
+                if name.endswith(".meta.json"):
+                    # Sidecars may stream before or after their response
+                    txt_name = name[:-len(".meta.json")] + ".txt"
+                    member_latency.setdefault(
+                        txt_name, json.loads(data).get("latency_ms"))
+                    continue
+                if name in seen:
+                    skipped.append(f"{Path(archive).name}:{name}")
+                    continue
+                seen.add(name)
+                source_keys[name] = sha256_str(f"{Path(archive).resolve()}!{name}")
+                futures.append(pool.submit(
+                    parse_response_member, name, data, prompt_map, archive))
+
+        for future in futures:
+            record = future.result()
+            if record is not None:
+                if record["source_file"] not in loose_names:
+                    record["latency_ms"] = member_latency.get(record["source_file"])
+                records.append(record)
+
+    records.sort(key=lambda rec: rec["source_file"])
+    if verbose:
+        for rec in records:
+            print(f"   ✓ {rec['source_file']}")
+
+    # Batches reuse the run1..runN names, so collisions are worth a look
+    if skipped:
+        print(f"⚠️  Skipped {len(skipped)} archive members whose name was already "
+              f"converted (loose files and earlier archives win):")
+        for entry in skipped:
+            print(f"   - {entry}")
 
     if records:
+        # Store first: runs already in the database keep their run_id,
+        # and the JSONL must carry the same ids
+        if db_path:
+            from results_store import connect, insert_records
+            conn = connect(db_path)
+            insert_records(conn, records,
+                           [source_keys[rec["source_file"]] for rec in records])
+            conn.close()
+
         with output_file.open("w", encoding="utf-8") as f:
             for rec in records:
                 f.write(json.dumps(rec) + "\n")
         print(f"\n✓ Converted {len(records)} responses")
         print(f"✓ Saved to {output_file}")
+        if db_path:
+            print(f"✓ Stored in {db_path}")
+
+        if not verbose:
+            return records
 
         # Print summary
         import pandas as pd
@@ -215,12 +374,21 @@ def convert_manual_to_jsonl():
     else:
         print("❌ No valid responses found")
         print("   Check file naming: {family}_{condition}_{model}_run{N}.txt")
+    return records
 
 
 if __name__ == "__main__":
     import sys
 
-    if "--convert" in sys.argv:
-        convert_manual_to_jsonl()
+    if "--watch" in sys.argv:
+        from watch_results import watch
+        watch()
+    elif "--convert" in sys.argv:
+        from results_store import parse_source_args
+        archives = [sys.argv[i + 1] for i, arg in enumerate(sys.argv)
+                    if arg == "--archive" and i + 1 < len(sys.argv)]
+        if "--archives" in sys.argv:
+            archives += find_archives(Path("results/manual_responses"))
+        convert_manual_to_jsonl(parse_source_args(sys.argv)[0], archives)
     else:
         create_manual_collection_guide()
@@ -0,0 +1,360 @@
+"""
+summary_store.py
+Persistent running aggregates behind summary_by_condition.csv.
+Keeps count, mean and sum of squared deviations (Welford) for every
+(model, family, condition, metric) cell, so newly scored runs are folded
+in without touching the history, and the summary table and hypothesis-test
+inputs are built from the stored cells alone.
+analyze_bias.py and run_analysis.py keep the store in sync with every
+unfiltered run and build their summary and tests from it.
+Usage:
+  python src/summary_store.py --fold [analysis/all_runs_scored.csv | --db [PATH] [filters]]
+  python src/summary_store.py --summary
+  python src/summary_store.py --verify [analysis/all_runs_scored.csv | --db [PATH]]
+Outputs: analysis/summary_aggregates.db, analysis/summary_by_condition.csv
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import pandas as pd
+
+from bias_stats import print_tests_from_stats, summarize_by_condition
+from results_store import connect as connect_results, load_scored_frame, parse_source_args
+
+AGG_PATH = "analysis/summary_aggregates.db"
+SCORED_PATH = "analysis/all_runs_scored.csv"
+# Next to a scored CSV: hash of the contents when it is the complete table
+COMPLETE_SUFFIX = ".complete"
+
+# Metrics summarize_by_condition reports (mean and/or std)
+SUMMARY_METRICS = ("vader_compound", "textblob_polarity", "len_chars",
+                   "len_words", "total_mentions")
+
+# Relative difference tolerated by --verify (float summation order)
+VERIFY_TOLERANCE = 1e-9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cells (
+    model TEXT NOT NULL,
+    prompt_family TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    PRIMARY KEY (model, prompt_family, condition, metric)
+);
+CREATE TABLE IF NOT EXISTS folded_runs (
+    run_id TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_family TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    vals TEXT NOT NULL
+);
+"""
+
+_RUNS = "_runs"   # cell metric counting folded runs per group
+
+
+def connect(path=AGG_PATH):
+    """Open (and if needed create) the aggregate store"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _number(value):
+    """Float value of a score, or None when missing/NaN"""
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _add(cell, x):
+    n, mean, m2 = cell
+    n += 1
+    d = x - mean
+    mean += d / n
+    return n, mean, m2 + d * (x - mean)
+
+
+def _remove(cell, x):
+    n, mean, m2 = cell
+    if n <= 1:
+        return 0, 0.0, 0.0
+    n -= 1
+    d = x - mean
+    mean -= d / n
+    return n, mean, max(0.0, m2 - d * (x - mean))
+
+
+def _combine(a, b):
+    """Chan et al. merge of two (n, mean, m2) aggregates"""
+    n = a[0] + b[0]
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = b[1] - a[1]
+    return (n, a[1] + delta * b[0] / n,
+            a[2] + b[2] + delta * delta * a[0] * b[0] / n)
+
+
+def _load_cells(conn):
+    return {tuple(row[:4]): tuple(row[4:]) for row in conn.execute(
+        "SELECT model, prompt_family, condition, metric, n, mean, m2 FROM cells")}
+
+
+def _save_cells(conn, cells, dirty):
+    conn.executemany(
+        "DELETE FROM cells WHERE model = ? AND prompt_family = ? "
+        "AND condition = ? AND metric = ?",
+        [key for key in dirty if cells[key][0] == 0])
+    conn.executemany(
+        "INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(*key, *cells[key]) for key in dirty if cells[key][0] > 0])
+
+
+def _apply(cells, dirty, group, vals, op):
+    cells[group + (_RUNS,)] = op(cells.get(group + (_RUNS,), (0, 0.0, 0.0)), 0.0)
+    dirty.add(group + (_RUNS,))
+    for metric, x in vals.items():
+        if x is not None:
+            key = group + (metric,)
+            cells[key] = op(cells.get(key, (0, 0.0, 0.0)), x)
+            dirty.add(key)
+
+
+def fold_rows(conn, rows):
+    """
+    Fold scored rows (all_runs_scored shape) into the aggregates.
+    A run_id seen before with different scores has its old contribution
+    removed first; unchanged runs are skipped.
+    Returns (added, replaced, unchanged) counts.
+    """
+    cells = _load_cells(conn)
+    dirty = set()
+    added = replaced = unchanged = 0
+
+    with conn:
+        for row in rows:
+            group = (row["model"], row["prompt_family"], row["condition"])
+            vals = {m: _number(row.get(m)) for m in SUMMARY_METRICS}
+            encoded = json.dumps(vals, sort_keys=True)
+
+            old = conn.execute(
+                "SELECT model, prompt_family, condition, vals FROM folded_runs "
+                "WHERE run_id = ?", (row["run_id"],)).fetchone()
+            if old is not None:
+                if tuple(old[:3]) == group and old[3] == encoded:
+                    unchanged += 1
+                    continue
+                _apply(cells, dirty, tuple(old[:3]), json.loads(old[3]), _remove)
+                replaced += 1
+            else:
+                added += 1
+
+            _apply(cells, dirty, group, vals, _add)
+            conn.execute("INSERT OR REPLACE INTO folded_runs VALUES (?, ?, ?, ?, ?)",
+                         (row["run_id"], *group, encoded))
+        _save_cells(conn, cells, dirty)
+    return added, replaced, unchanged
+
+
+def remove_runs(conn, run_ids):
+    """Take previously folded runs back out of the aggregates"""
+    cells = _load_cells(conn)
+    dirty = set()
+    n = 0
+    with conn:
+        for run_id in run_ids:
+            old = conn.execute(
+                "SELECT model, prompt_family, condition, vals FROM folded_runs "
+                "WHERE run_id = ?", (run_id,)).fetchone()
+            if old is None:
+                continue
+            _apply(cells, dirty, tuple(old[:3]), json.loads(old[3]), _remove)
+            conn.execute("DELETE FROM folded_runs WHERE run_id = ?", (run_id,))
+            n += 1
+        _save_cells(conn, cells, dirty)
+    return n
+
+
+def sync_rows(conn, rows):
+    """
+    Make the aggregates match a complete scored table: runs no longer in
+    it are taken out (a fresh --convert issues new run_ids), the rest are
+    folded in. Returns (added, replaced, unchanged, removed) counts.
+    """
+    rows = list(rows)
+    removed = remove_runs(
+        conn, folded_run_ids(conn) - {row["run_id"] for row in rows})
+    return fold_rows(conn, rows) + (removed,)
+
+
+def folded_run_ids(conn):
+    """Every run_id currently counted in the aggregates"""
+    return {row[0] for row in conn.execute("SELECT run_id FROM folded_runs")}
+
+
+def _condition_cells(conn):
+    """Cells merged across models: (family, condition) -> metric -> (n, mean, m2)"""
+    merged = defaultdict(dict)
+    for (model, family, condition, metric), cell in sorted(_load_cells(conn).items()):
+        group = merged[(family, condition)]
+        group[metric] = _combine(group.get(metric, (0, 0.0, 0.0)), cell)
+    return merged
+
+
+def _mean(cell):
+    return cell[1] if cell[0] else float("nan")
+
+
+def _std(cell):
+    return math.sqrt(cell[2] / (cell[0] - 1)) if cell[0] > 1 else float("nan")
+
+
+def summary_frame(conn):
+    """summary_by_condition table built from the stored aggregates"""
+    empty = (0, 0.0, 0.0)
+    rows = []
+    for (family, condition), m in sorted(_condition_cells(conn).items()):
+        rows.append({
+            "prompt_family": family,
+            "condition": condition,
+            "n_runs": m.get(_RUNS, empty)[0],
+            "vader_mean": _mean(m.get("vader_compound", empty)),
+            "vader_std": _std(m.get("vader_compound", empty)),
+            "tb_mean": _mean(m.get("textblob_polarity", empty)),
+            "tb_std": _std(m.get("textblob_polarity", empty)),
+            "len_mean": _mean(m.get("len_chars", empty)),
+            "words_mean": _mean(m.get("len_words", empty)),
+            "mentions_mean": _mean(m.get("total_mentions", empty)),
+        })
+    return pd.DataFrame(rows, columns=[
+        "prompt_family", "condition", "n_runs", "vader_mean", "vader_std",
+        "tb_mean", "tb_std", "len_mean", "words_mean", "mentions_mean"])
+
+
+def group_stats(conn, metric="vader_compound"):
+    """Hypothesis-test inputs: (family, condition) -> (mean, std, n)"""
+    return {key: (_mean(m[metric]), _std(m[metric]), m[metric][0])
+            for key, m in _condition_cells(conn).items() if metric in m}
+
+
+def verify(conn, df):
+    """
+    Compare the stored aggregates against a full recompute over df.
+    Returns a list of human-readable differences (empty when they agree).
+    """
+    expected = summarize_by_condition(df) \
+        .set_index(["prompt_family", "condition"]).sort_index()
+    actual = summary_frame(conn).set_index(["prompt_family", "condition"]).sort_index()
+
+    problems = [f"{key}: missing from aggregates" for key in expected.index.difference(actual.index)]
+    problems += [f"{key}: not in recompute" for key in actual.index.difference(expected.index)]
+    for key in expected.index.intersection(actual.index):
+        for column in expected.columns:
+            want, got = expected.at[key, column], actual.at[key, column]
+            if pd.isna(want) and pd.isna(got):
+                continue
+            if pd.isna(want) or pd.isna(got) or \
+                    abs(got - want) > VERIFY_TOLERANCE * max(1.0, abs(want)):
+                problems.append(f"{key} {column}: aggregate={got} recompute={want}")
+    return problems
+
+
+def _file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def write_scored_table(df, path=SCORED_PATH, complete=False):
+    """
+    Write a scored CSV. A complete table (every run, no filters) gets a
+    marker holding its content hash; a filtered slice removes it, so
+    --fold never retires runs just because a slice left them out.
+    """
+    df.to_csv(path, index=False)
+    marker = Path(str(path) + COMPLETE_SUFFIX)
+    if complete:
+        marker.write_text(_file_hash(path), encoding="utf-8")
+    else:
+        marker.unlink(missing_ok=True)
+
+
+def is_complete_table(path):
+    """Whether a scored CSV is marked complete and unchanged since"""
+    marker = Path(str(path) + COMPLETE_SUFFIX)
+    return marker.is_file() and \
+        marker.read_text(encoding="utf-8").strip() == _file_hash(path)
+
+
+def _scored_frame(argv):
+    """
+    Scored runs from the SQLite store (--db) or a scored CSV, and whether
+    they are the complete table (no filters applied, or a CSV marked
+    complete by write_scored_table).
+    """
+    db_path, filters = parse_source_args(argv)
+    if db_path:
+        conn = connect_results(db_path)
+        df = load_scored_frame(conn, **filters)
+        conn.close()
+        return df, not filters
+    flag = "--fold" if "--fold" in argv else "--verify"
+    i = argv.index(flag)
+    path = argv[i + 1] if i + 1 < len(argv) and not argv[i + 1].startswith("--") \
+        else SCORED_PATH
+    if not Path(path).exists():
+        raise SystemExit(f"❌ No {path} found.\n   Run: python src/analyze_bias.py")
+    return pd.read_csv(path), is_complete_table(path)
+
+
+def write_summary(conn, out="analysis/summary_by_condition.csv"):
+    """Write summary_by_condition.csv from the aggregates"""
+    g = summary_frame(conn)
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    g.to_csv(out, index=False)
+    return g
+
+
+if __name__ == "__main__":
+    argv = sys.argv
+    conn = connect()
+
+    if "--fold" in argv:
+        df, complete = _scored_frame(argv)
+        rows = df.to_dict("records")
+        # A filtered slice (or an unmarked CSV) only adds runs; a complete
+        # table also retires the runs it no longer contains
+        added, replaced, unchanged, removed = sync_rows(conn, rows) \
+            if complete else fold_rows(conn, rows) + (0,)
+        print(f"✓ Folded {added} new and {replaced} changed runs into {AGG_PATH} "
+              f"({unchanged} unchanged, {removed} removed)")
+    elif "--summary" in argv:
+        g = write_summary(conn)
+        print("✓ Saved analysis/summary_by_condition.csv (from aggregates)")
+        print("\n" + "="*80)
+        print("SUMMARY BY CONDITION")
+        print("="*80)
+        print(g.to_string(index=False))
+        print_tests_from_stats(group_stats(conn))
+    elif "--verify" in argv:
+        problems = verify(conn, _scored_frame(argv)[0])
+        if problems:
+            print(f"❌ Aggregates differ from a full recompute ({len(problems)}):")
+            for p in problems:
+                print(f"   {p}")
+            sys.exit(1)
+        print("✓ Aggregates match a full recompute")
+    else:
+        print(__doc__)
+    conn.close()
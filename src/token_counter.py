@@ -0,0 +1,61 @@
+"""
+token_counter.py
+Fast local token counting for prompts and responses.
+Uses tiktoken (cl100k_base) when installed, otherwise a BPE-like
+approximation. Counts are cached by text hash, so the handful of prompt
+texts shared by thousands of runs are only tokenized once.
+"""
+
+import hashlib
+import math
+import re
+from collections import OrderedDict
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+TOKENIZER = "tiktoken/cl100k_base" if TIKTOKEN_AVAILABLE else "approx"
+
+# Distinct texts whose counts are kept
+TOKEN_CACHE_SIZE = 65536
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_cache = OrderedDict()
+
+
+def _approx_tokens(text: str) -> int:
+    """
+    BPE-like estimate: short words and punctuation marks are one token,
+    longer words about one per 5 characters, digits one per 3.
+    """
+    n = 0
+    for p in _PIECE.findall(text):
+        if p.isdigit():
+            n += math.ceil(len(p) / 3)
+        elif len(p) <= 6:
+            n += 1
+        else:
+            n += math.ceil(len(p) / 5)
+    return n
+
+
+def count_tokens(text: str) -> int:
+    """Token count for text, served from an LRU cache keyed by its hash"""
+    if not text:
+        return 0
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    n = len(_ENCODING.encode(text, disallowed_special=())) \
+        if TIKTOKEN_AVAILABLE else _approx_tokens(text)
+    _cache[key] = n
+    if len(_cache) > TOKEN_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return n
@@ -5,6 +5,13 @@ Helper functions for reading data and generating hashes.
 
 from pathlib import Path
 import hashlib
+import json
+
+# data_hash -> roster CSV, written by experiment_design.py
+REGISTRY_PATH = "data/ground_truth_registry.json"
+
+# Immutable per-hash copies of every registered roster
+ROSTER_SNAPSHOT_DIR = "data/rosters"
 
 
 def read_text(fp: str) -> str:
@@ -40,3 +47,37 @@ def read_data_block(csv_path: str) -> str:
 def sha256_str(s: str) -> str:
     """Generate SHA256 hash of string for data verification"""
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def dataset_hash(csv_path: str) -> str:
+    """data_hash a prompt suite built from this roster CSV would carry"""
+    return sha256_str(read_data_block(csv_path))
+
+
+def load_dataset_registry() -> dict:
+    """Read the data_hash -> roster CSV registry (empty if missing)"""
+    path = Path(REGISTRY_PATH)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def register_dataset(csv_path: str, data_hash: str = None) -> str:
+    """
+    Record which roster a data_hash was built from. The roster is
+    snapshotted to data/rosters/<data_hash>.csv, so the hash still resolves
+    after the original CSV is replaced in place for a new season.
+    """
+    data_hash = data_hash or dataset_hash(csv_path)
+    snapshot = Path(ROSTER_SNAPSHOT_DIR) / f"{data_hash}.csv"
+    if not snapshot.exists():
+        snapshot.parent.mkdir(parents=True, exist_ok=True)
+        snapshot.write_bytes(Path(csv_path).read_bytes())
+
+    registry = load_dataset_registry()
+    if registry.get(data_hash) != snapshot.as_posix():
+        registry[data_hash] = snapshot.as_posix()
+        Path(REGISTRY_PATH).parent.mkdir(parents=True, exist_ok=True)
+        Path(REGISTRY_PATH).write_text(
+            json.dumps(registry, indent=2), encoding="utf-8")
+    return data_hash
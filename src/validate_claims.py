@@ -2,22 +2,352 @@
 validate_claims.py
 Checks LLM statements against ground truth data.
 Detects fabrications and statistical misrepresentations.
+Usage: python src/validate_claims.py [--db [PATH]] [filters] [--parallel [N]]
+--parallel spreads extraction and validation over N worker processes
+(default: one per CPU); the report is identical to a serial run.
 Outputs: analysis/claim_mismatches.json, analysis/validation_report.txt
 """
 
 import re
 import csv
+import heapq
 import json
+import os
+import sys
 from pathlib import Path
 from collections import defaultdict
-
-
-def load_ground_truth(csv_path="data/players_anonymized.csv"):
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+from records import VALIDATE_FIELDS
+from results_store import connect, parse_source_args, read_records, save_mismatches
+from utils import ROSTER_SNAPSHOT_DIR, dataset_hash, load_dataset_registry
+
+DEFAULT_TRUTH_PATH = "data/players_anonymized.csv"
+
+# Rosters kept parsed and indexed at once (one per season/roster in use)
+TRUTH_CACHE_SIZE = 8
+
+# Raw count columns in the roster CSV
+BASE_STATS = ['goals', 'assists', 'turnovers', 'minutes']
+
+# Stats where a lower value is the better one ("best turnover rate")
+LOWER_IS_BETTER = {'turnovers', 'turnovers_per_min'}
+
+# Relative tolerance for "about/around/roughly N" claims
+APPROX_TOLERANCE = 0.10
+
+# Phrases used in responses -> stat key in the derived index
+STAT_ALIASES = {
+    'goals': 'goals', 'goal': 'goals', 'scoring': 'goals',
+    'assists': 'assists', 'assist': 'assists',
+    'turnovers': 'turnovers', 'turnover': 'turnovers',
+    'minutes': 'minutes',
+    'contributions': 'contributions', 'offensive output': 'contributions',
+    'offensive production': 'contributions', 'production': 'contributions',
+    'assist-to-turnover ratio': 'assist_turnover_ratio',
+    'assist/turnover ratio': 'assist_turnover_ratio',
+}
+
+ORDINALS = {'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5}
+
+SUPERLATIVES = {
+    'highest': 'max', 'most': 'max', 'lowest': 'min', 'fewest': 'min',
+    'best': 'best', 'worst': 'worst',
+}
+
+# Chunks per worker in --parallel mode; more chunks even out uneven texts
+CHUNKS_PER_WORKER = 4
+
+# Scope words after a ranking claim ("the most goals among juniors")
+CLASS_WORDS = {
+    'freshman': 'Freshman', 'freshmen': 'Freshman',
+    'sophomore': 'Sophomore', 'sophomores': 'Sophomore',
+    'junior': 'Junior', 'juniors': 'Junior',
+    'senior': 'Senior', 'seniors': 'Senior',
+}
+ROSTER_WORDS = {'player', 'players', 'team', 'roster', 'squad', 'group', 'dataset'}
+
+THRESHOLDS = {
+    'over': 'gt', 'more than': 'gt', 'at least': 'ge', 'under': 'lt',
+    'fewer than': 'lt', 'less than': 'lt', 'nearly': 'near', 'almost': 'near',
+    'about': 'approx', 'around': 'approx', 'roughly': 'approx',
+    'approximately': 'approx',
+}
+
+
+def load_ground_truth(csv_path=DEFAULT_TRUTH_PATH):
     """Load the actual player statistics"""
     with open(csv_path, newline="", encoding="utf-8") as f:
         return {row['player_id']: row for row in csv.DictReader(f)}
 
 
+def resolve_truth_path(data_hash):
+    """
+    Find the roster CSV a data_hash was built from: the registry written
+    by experiment_design.py first, then any data/*.csv whose data block
+    hashes to it. A registry entry only counts while its file still hashes
+    to data_hash (rosters get replaced in place between seasons).
+    Read-only: the registry is never written from here.
+    """
+    def matches(csv_path):
+        try:
+            return dataset_hash(csv_path) == data_hash
+        except (KeyError, IndexError):
+            return False  # not a roster file
+
+    path = load_dataset_registry().get(data_hash)
+    if path and Path(path).exists() and matches(path):
+        return path
+
+    snapshot = Path(ROSTER_SNAPSHOT_DIR) / f"{data_hash}.csv"
+    if snapshot.exists() and matches(snapshot):
+        return snapshot.as_posix()
+
+    for csv_path in sorted(Path("data").glob("*.csv")):
+        if matches(csv_path):
+            return csv_path.as_posix()
+    return None
+
+
+@lru_cache(maxsize=TRUTH_CACHE_SIZE)
+def truth_for_hash(data_hash):
+    """
+    Ground truth and derived stat index for one data_hash, loaded lazily
+    and kept in a bounded LRU cache. Returns (None, None) when no roster
+    for the hash can be found: those records are reported as unvalidated
+    rather than checked against some other season's numbers.
+    """
+    path = resolve_truth_path(data_hash) if data_hash else None
+    if path is None:
+        print(f"⚠️  No roster found for data_hash {str(data_hash)[:12]}, "
+              f"its responses are left unvalidated")
+        return None, None
+    truth = load_ground_truth(path)
+    return truth, build_stat_index(truth)
+
+
+def build_stat_index(truth):
+    """
+    Precompute every derived statistic the comparative claims can refer to.
+    Holds values, per-minute rates, ratios and ranks in both directions so
+    each claim resolves with dictionary lookups, independent of roster size.
+    Ranks are also kept per class_year for class-scoped claims.
+    """
+    values = defaultdict(dict)
+    for player_id, row in truth.items():
+        base = {stat: float(row[stat]) for stat in BASE_STATS}
+        minutes = base['minutes']
+        base['contributions'] = base['goals'] + base['assists']
+        for stat in ['goals', 'assists', 'turnovers', 'contributions']:
+            base[f"{stat}_per_min"] = base[stat] / minutes if minutes else 0.0
+        base['assist_turnover_ratio'] = (
+            base['assists'] / base['turnovers'] if base['turnovers'] else float('inf'))
+        for stat, val in base.items():
+            values[stat][player_id] = val
+
+    rank_asc, rank_desc = _competition_ranks(values)
+
+    # The same ranks within each class year, for "among juniors" claims
+    class_of = {p: row['class_year'].strip().capitalize()
+                for p, row in truth.items() if row.get('class_year')}
+    rank_by_class = {}
+    for cls in set(class_of.values()):
+        members = {p for p, c in class_of.items() if c == cls}
+        asc, desc = _competition_ranks(
+            {stat: {p: v for p, v in per_player.items() if p in members}
+             for stat, per_player in values.items()})
+        rank_by_class[cls] = {'asc': asc, 'desc': desc}
+
+    return {'values': dict(values), 'rank_desc': rank_desc, 'rank_asc': rank_asc,
+            'class_of': class_of, 'rank_by_class': rank_by_class}
+
+
+def _competition_ranks(values):
+    """Competition ranking ("1224") per stat: ties share the better rank"""
+    rank_asc, rank_desc = {}, {}
+    for stat, per_player in values.items():
+        ordered = sorted(per_player.values())
+        n = len(ordered)
+        first_at = {}
+        for i, val in enumerate(ordered):
+            first_at.setdefault(val, i)
+        last_at = {val: i for i, val in enumerate(ordered)}
+        rank_asc[stat] = {p: first_at[v] + 1 for p, v in per_player.items()}
+        rank_desc[stat] = {p: n - last_at[v] for p, v in per_player.items()}
+    return rank_asc, rank_desc
+
+
+def _stat_key(noun, rate=False):
+    """Map a stat phrase (plus an optional 'rate' suffix) to an index key"""
+    stat = STAT_ALIASES[noun.lower()]
+    if rate and stat in ('goals', 'assists', 'turnovers', 'contributions'):
+        stat = f"{stat}_per_min"
+    return stat
+
+
+def _scope(word):
+    """
+    Resolve the word after among/of any/for a/in his class into a class
+    year, 'own' (the player's own class) or None (whole roster).
+    Returns False for scopes the index cannot rank (positions, starters).
+    """
+    if not word:
+        return None
+    word = word.lower()
+    if word in CLASS_WORDS:
+        return CLASS_WORDS[word]
+    if word in ('class', 'grade', 'year'):
+        return 'own'
+    return None if word in ROSTER_WORDS else False
+
+
+def _direction(superlative, stat):
+    """Resolve highest/lowest/best/worst into a rank direction for a stat"""
+    kind = SUPERLATIVES[superlative.lower()]
+    if kind == 'best':
+        return 'asc' if stat in LOWER_IS_BETTER else 'desc'
+    if kind == 'worst':
+        return 'desc' if stat in LOWER_IS_BETTER else 'asc'
+    return 'desc' if kind == 'max' else 'asc'
+
+
+def extract_comparative_claims(text):
+    """
+    Extract ranking and approximate claims from LLM response.
+    Patterns: "Player B leads the team in assists", "Player D has the
+    lowest turnover rate", "Player B recorded 35 assists (highest ...)",
+    "Player E scored over 40 goals"
+    Ranking claims scoped to a class year ("... among juniors", "of any
+    senior", "in his class") are ranked within that class; other scopes
+    ("among starters") cannot be checked and are skipped.
+    """
+    claims = []
+    stat_re = "|".join(sorted((re.escape(a) for a in STAT_ALIASES),
+                              key=len, reverse=True))
+    sup_re = r'(?:(second|third|fourth|fifth)[- ])?(highest|most|lowest|fewest|best|worst)'
+    rate_re = r'(?:\s+(rate|per\s+minute))?'
+    scope_re = r'(?:\s+(?:among|of\s+(?:any|all)|for\s+an?|in\s+(?:his|her|their|the))\s+(?:the\s+|other\s+|all\s+)*([a-z]+))?'
+
+    # Pattern 1: Player B leads the team in assists
+    pattern1 = rf'Player\s+([A-F])\s+(?:leads|led)\s+(?:the\s+team\s+|all\s+players\s+)?in\s+({stat_re}){rate_re}{scope_re}'
+    for match in re.finditer(pattern1, text, re.IGNORECASE):
+        scope = _scope(match.group(4))
+        if scope is False:
+            continue
+        stat = _stat_key(match.group(2), bool(match.group(3)))
+        claims.append({
+            'player': match.group(1),
+            'stat': stat,
+            'direction': 'desc',
+            'rank': 1,
+            'pattern': 'leads'
+        })
+        if scope:
+            claims[-1]['scope'] = scope
+
+    # Pattern 2: Player D has the lowest turnover rate
+    pattern2 = rf'Player\s+([A-F])\s+(?:has|had|owns|posts|shows|with)\s+the\s+{sup_re}\s+({stat_re})(?:\s+(?:total|count))?{rate_re}{scope_re}'
+    for match in re.finditer(pattern2, text, re.IGNORECASE):
+        scope = _scope(match.group(6))
+        if scope is False:
+            continue
+        stat = _stat_key(match.group(4), bool(match.group(5)))
+        claims.append({
+            'player': match.group(1),
+            'stat': stat,
+            'direction': _direction(match.group(3), stat),
+            'rank': ORDINALS.get((match.group(2) or '').lower(), 1),
+            'pattern': 'superlative'
+        })
+        if scope:
+            claims[-1]['scope'] = scope
+
+    # Pattern 3: Player B recorded "35 assists" (highest in the dataset)
+    # The gap may not cross a clause boundary, and a stat named after the
+    # superlative must be the quoted one. Only the rank is checked here;
+    # the count itself is extract_stat_claims' job.
+    gap_re = r'(?:(?!\b(?:but|while|whereas|Player)\b)[^.,;\n]){0,40}?(?:,\s*(?:the\s+)?)?'
+    pattern3 = rf'Player\s+([A-F])(?:\'s)?\s+(?:has|had|scored|recorded|made|committed|with)?\s*"?(\d+)\s+({stat_re})"?{gap_re}\b{sup_re}\b(?:\s+({stat_re}))?{rate_re}{scope_re}'
+    for match in re.finditer(pattern3, text, re.IGNORECASE):
+        rate = bool(match.group(7))
+        stat = _stat_key(match.group(3), rate)
+        scope = _scope(match.group(8))
+        if scope is False or (match.group(6) and _stat_key(match.group(6), rate) != stat):
+            continue
+        claims.append({
+            'player': match.group(1),
+            'stat': stat,
+            'direction': _direction(match.group(5), stat),
+            'rank': ORDINALS.get((match.group(4) or '').lower(), 1),
+            'pattern': 'value_superlative'
+        })
+        if scope:
+            claims[-1]['scope'] = scope
+
+    # Pattern 4: Player E scored over 40 goals
+    thr_re = "|".join(sorted(THRESHOLDS, key=len, reverse=True))
+    pattern4 = rf'Player\s+([A-F])\s+(?:has|had|scored|recorded|made|committed|played|posted|with)\s+({thr_re})\s+(\d+)\s+({stat_re})'
+    for match in re.finditer(pattern4, text, re.IGNORECASE):
+        claims.append({
+            'player': match.group(1),
+            'stat': _stat_key(match.group(4)),
+            'threshold': THRESHOLDS[match.group(2).lower()],
+            'bound': int(match.group(3)),
+            'pattern': 'threshold'
+        })
+
+    return claims
+
+
+def validate_comparative_claim(index, claim):
+    """Check a ranking or threshold claim against the derived stat index"""
+    player_id = claim['player']
+    stat = claim['stat']
+    per_player = index['values'].get(stat, {})
+    if player_id not in per_player:
+        return False, f"Player {player_id} not in dataset"
+
+    actual = per_player[player_id]
+    label = stat.replace('_', ' ').capitalize()
+    errors = []
+
+    if 'rank' in claim:
+        ranks = index[f"rank_{claim['direction']}"][stat]
+        scope = claim.get('scope')
+        if scope:
+            player_class = index['class_of'].get(player_id)
+            if scope != 'own' and scope != player_class:
+                return False, f"Player {player_id} is a {player_class}, not a {scope}"
+            ranks = index['rank_by_class'][player_class][claim['direction']][stat]
+        if ranks[player_id] != claim['rank']:
+            order = 'highest' if claim['direction'] == 'desc' else 'lowest'
+            among = f" among {player_class}s" if scope else ""
+            errors.append(
+                f"{label}: claimed rank {claim['rank']} ({order}){among}, "
+                f"actual rank {ranks[player_id]}")
+
+    if 'threshold' in claim:
+        bound = claim['bound']
+        kind = claim['threshold']
+        ok = {
+            'gt': actual > bound,
+            'ge': actual >= bound,
+            'lt': actual < bound,
+            'near': bound * (1 - APPROX_TOLERANCE) <= actual <= bound,
+            'approx': abs(actual - bound) <= bound * APPROX_TOLERANCE,
+        }[kind]
+        if not ok:
+            errors.append(
+                f"{label}: claimed {kind} {bound}, actual {actual:g}")
+
+    if errors:
+        return False, "; ".join(errors)
+
+    return True, "Correct"
+
+
 def extract_stat_claims(text):
     """
     Extract statistical claims from LLM response.
@@ -107,56 +437,47 @@ def validate_claim(truth, claim):
     return True, "Correct"
 
 
-def main():
-    """Main validation routine"""
-    results_path = Path("results/outputs.jsonl")
-    if not results_path.exists():
-        raise SystemExit("❌ No results/outputs.jsonl found.\n"
-                         "   Run: python src/run_experiment.py --convert")
-
-    print("Validating LLM claims against ground truth...\n")
-
-    truth = load_ground_truth()
-
-    # Track all mismatches and statistics
-    all_mismatches = []
-    stats_by_condition = defaultdict(lambda: {'total_claims': 0, 'errors': 0})
-
-    for line in results_path.read_text(encoding="utf-8").splitlines():
-        record = json.loads(line)
-        text = record["response_text"]
-
-        # Extract claims from this response
-        claims = extract_stat_claims(text)
-
-        condition_key = f"{record['prompt_family']}_{record['condition']}"
-        stats_by_condition[condition_key]['total_claims'] += len(claims)
-
-        # Validate each claim
-        for claim in claims:
-            is_valid, message = validate_claim(truth, claim)
-
-            if not is_valid:
-                mismatch = {
-                    "run_id": record["run_id"],
-                    "model": record["model"],
-                    "prompt_family": record["prompt_family"],
-                    "condition": record["condition"],
-                    "player": claim['player'],
-                    "claim": claim,
-                    "error": message,
-                    "pattern": claim.get('pattern', 'unknown')
-                }
-                all_mismatches.append(mismatch)
-                stats_by_condition[condition_key]['errors'] += 1
-
-    # Save mismatches
-    Path("analysis").mkdir(exist_ok=True)
-    mismatch_file = Path("analysis/claim_mismatches.json")
-    mismatch_file.write_text(json.dumps(
-        all_mismatches, indent=2), encoding="utf-8")
-
-    # Generate validation report
+def validate_record(record, truth, index):
+    """
+    Extract and validate every claim in one outputs.jsonl record.
+    Returns (number of claims, list of mismatch dicts); the count is None
+    when there is no ground truth (truth is None) to check against.
+    """
+    if truth is None:
+        return None, []
+    text = record["response_text"]
+
+    # Extract claims from this response
+    claims = extract_stat_claims(text)
+    comparative = extract_comparative_claims(text)
+    if not index['class_of']:
+        # Rosters without class_year cannot rank "among juniors" claims
+        comparative = [c for c in comparative if 'scope' not in c]
+
+    # Validate each claim
+    checks = [(c, validate_claim(truth, c)) for c in claims]
+    checks += [(c, validate_comparative_claim(index, c))
+               for c in comparative]
+
+    mismatches = []
+    for claim, (is_valid, message) in checks:
+        if not is_valid:
+            mismatches.append({
+                "run_id": record["run_id"],
+                "model": record["model"],
+                "prompt_family": record["prompt_family"],
+                "condition": record["condition"],
+                "player": claim['player'],
+                "claim": claim,
+                "error": message,
+                "pattern": claim.get('pattern', 'unknown')
+            })
+
+    return len(checks), mismatches
+
+
+def build_report(stats_by_condition, all_mismatches):
+    """Render the validation report as a list of lines"""
     report_lines = []
     report_lines.append("="*80)
     report_lines.append("CLAIM VALIDATION REPORT")
@@ -165,11 +486,15 @@ def main():
 
     total_claims = sum(s['total_claims'] for s in stats_by_condition.values())
     total_errors = sum(s['errors'] for s in stats_by_condition.values())
+    unvalidated = sum(s.get('unvalidated', 0) for s in stats_by_condition.values())
 
     report_lines.append(f"Total claims extracted: {total_claims}")
     report_lines.append(f"Total errors found: {total_errors}")
     report_lines.append(
         f"Accuracy rate: {100*(1-total_errors/total_claims) if total_claims > 0 else 100:.1f}%")
+    if unvalidated:
+        report_lines.append(
+            f"Unvalidated responses (no roster for their data_hash): {unvalidated}")
     report_lines.append("")
 
     report_lines.append("Breakdown by condition:")
@@ -202,10 +527,153 @@ def main():
         report_lines.append("")
 
     report_lines.append("="*80)
+    return report_lines
 
-    # Write report
+
+def write_outputs(stats_by_condition, all_mismatches):
+    """Save claim_mismatches.json and validation_report.txt"""
+    Path("analysis").mkdir(exist_ok=True)
+    mismatch_file = Path("analysis/claim_mismatches.json")
+    mismatch_file.write_text(json.dumps(
+        all_mismatches, indent=2), encoding="utf-8")
+
+    report_lines = build_report(stats_by_condition, all_mismatches)
     report_file = Path("analysis/validation_report.txt")
     report_file.write_text("\n".join(report_lines), encoding="utf-8")
+    return mismatch_file, report_file, report_lines
+
+
+def new_condition_stats():
+    """Per-condition counters: claims, errors and unvalidated responses"""
+    return defaultdict(lambda: {'total_claims': 0, 'errors': 0, 'unvalidated': 0})
+
+
+def tally(stats_by_condition, record, n_claims, mismatches, sign=1):
+    """Add (sign=-1: take back) one record's validate_record result"""
+    stats = stats_by_condition[f"{record['prompt_family']}_{record['condition']}"]
+    if n_claims is None:
+        stats['unvalidated'] += sign
+    else:
+        stats['total_claims'] += sign * n_claims
+        stats['errors'] += sign * len(mismatches)
+
+
+def validate_serial(records):
+    """
+    Validate records in order. Returns (stats_by_condition, mismatches),
+    mismatches in input order.
+    """
+    all_mismatches = []
+    stats_by_condition = new_condition_stats()
+    for record in records:
+        truth, index = truth_for_hash(record.get("data_hash"))
+        n_claims, mismatches = validate_record(record, truth, index)
+        tally(stats_by_condition, record, n_claims, mismatches)
+        all_mismatches.extend(mismatches)
+    return stats_by_condition, all_mismatches
+
+
+def balanced_chunks(records, n_chunks):
+    """
+    Split record positions into n_chunks lists of similar total response
+    length (longest first onto the lightest chunk), each in input order.
+    """
+    heap = [(0, i, []) for i in range(n_chunks)]
+    order = sorted(range(len(records)),
+                   key=lambda i: -len(records[i]["response_text"] or ""))
+    for i in order:
+        load, k, chunk = heapq.heappop(heap)
+        chunk.append(i)
+        heapq.heappush(heap, (load + len(records[i]["response_text"] or ""), k, chunk))
+    return [sorted(chunk) for _, _, chunk in heap if chunk]
+
+
+# Ground truth per data_hash inside a worker process
+_WORKER_TRUTH = {}
+
+
+def _init_worker(shm_name, size):
+    """Load every roster from the shared block and index it once per worker"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    truths = json.loads(bytes(shm.buf[:size]).decode("utf-8"))
+    shm.close()
+    for data_hash, truth in truths.items():
+        _WORKER_TRUTH[data_hash] = (truth, build_stat_index(truth)) \
+            if truth is not None else (None, None)
+
+
+def _validate_chunk(chunk):
+    """Validate (position, record) pairs; returns per-position results"""
+    out = []
+    for pos, record in chunk:
+        truth, index = _WORKER_TRUTH[str(record.get("data_hash"))]
+        out.append((pos,) + validate_record(record, truth, index))
+    return out
+
+
+def validate_parallel(records, workers=None):
+    """
+    validate_serial spread over worker processes. Rosters are published
+    once in a shared memory block instead of being pickled with each
+    task, and chunks are balanced by response length. Results are merged
+    back in input order, so counters and mismatches match a serial run.
+    """
+    workers = workers or os.cpu_count() or 1
+    payload = json.dumps({str(h): truth_for_hash(h)[0] for h in
+                          {r.get("data_hash") for r in records}}).encode("utf-8")
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+    try:
+        shm.buf[:len(payload)] = payload
+        chunks = [[(i, records[i]) for i in chunk]
+                  for chunk in balanced_chunks(records, workers * CHUNKS_PER_WORKER)]
+        results = [None] * len(records)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, len(payload))) as pool:
+            for chunk_result in pool.map(_validate_chunk, chunks):
+                for pos, n_claims, mismatches in chunk_result:
+                    results[pos] = (n_claims, mismatches)
+    finally:
+        shm.close()
+        shm.unlink()
+
+    all_mismatches = []
+    stats_by_condition = new_condition_stats()
+    for record, (n_claims, mismatches) in zip(records, results):
+        tally(stats_by_condition, record, n_claims, mismatches)
+        all_mismatches.extend(mismatches)
+    return stats_by_condition, all_mismatches
+
+
+def main():
+    """Main validation routine"""
+    db_path, filters = parse_source_args(sys.argv)
+
+    print("Validating LLM claims against ground truth...\n")
+
+    # Input order throughout (truth_for_hash loads each roster once), so
+    # the artifacts match run_analysis.py's
+    records = list(read_records(db_path, fields=VALIDATE_FIELDS, **filters))
+    run_ids = [record["run_id"] for record in records]
+
+    if "--parallel" in sys.argv:
+        i = sys.argv.index("--parallel")
+        nxt = sys.argv[i + 1] if i + 1 < len(sys.argv) else ""
+        workers = int(nxt) if nxt.isdigit() else None
+        stats_by_condition, all_mismatches = validate_parallel(records, workers)
+    else:
+        stats_by_condition, all_mismatches = validate_serial(records)
+
+    if db_path:
+        conn = connect(db_path)
+        save_mismatches(conn, run_ids, all_mismatches)
+        conn.close()
+
+    # Save mismatches and report
+    mismatch_file, report_file, report_lines = write_outputs(
+        stats_by_condition, all_mismatches)
+
+    total_claims = sum(s['total_claims'] for s in stats_by_condition.values())
+    total_errors = len(all_mismatches)
 
     # Print to console
     print("\n".join(report_lines))
@@ -215,7 +683,8 @@ def main():
 
     if total_errors > 0:
         print(f"\n⚠️  Found {total_errors} fabricated/incorrect claims")
-        print(f"   Fabrication rate: {100*total_errors/total_claims:.1f}%")
+        if total_claims:
+            print(f"   Fabrication rate: {100*total_errors/total_claims:.1f}%")
     else:
         print("\n✓ All claims validated successfully!")
 
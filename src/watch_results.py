@@ -0,0 +1,293 @@
+"""
+watch_results.py
+Watch mode for live collection campaigns.
+Converts, scores and validates only new or changed response files,
+folds their scores into the persistent summary aggregates and re-renders
+only the figures whose inputs changed.
+Usage: python src/run_experiment.py --watch
+Outputs: results/outputs.jsonl, analysis/* (kept current while running)
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")  # never open windows from the watch loop
+
+import pandas as pd
+
+import analyze_bias
+import create_visualizations as viz
+import summary_store
+import validate_claims
+from run_experiment import load_prompt_map, parse_response_file
+from utils import sha256_str
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+
+RESPONSE_DIR = Path("results/manual_responses")
+OUTPUT_FILE = Path("results/outputs.jsonl")
+SCORED_FILE = Path("analysis/all_runs_scored.csv")
+SUMMARY_FILE = Path("analysis/summary_by_condition.csv")
+TOKENS_FILE = Path("analysis/tokens_by_condition.csv")
+SIDECAR_SUFFIX = ".meta.json"
+
+# Seconds a file must be quiet before it is processed
+DEBOUNCE_SECONDS = 1.0
+# Seconds between directory scans when inotify is unavailable
+POLL_INTERVAL = 2.0
+
+
+def _response_name(name):
+    """
+    The response file a changed name belongs to: a .txt itself, or the
+    .txt whose timing sidecar ({stem}.meta.json) changed. None otherwise.
+    """
+    if name.endswith(SIDECAR_SUFFIX):
+        return name[:-len(SIDECAR_SUFFIX)] + ".txt"
+    return name if name.endswith(".txt") else None
+
+
+def _watched(name):
+    return name.endswith((".txt", SIDECAR_SUFFIX))
+
+
+def _inotify_source(response_dir):
+    """Event reader backed by inotify; returns changed .txt names"""
+    inotify = INotify()
+    mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+    inotify.add_watch(str(response_dir), mask)
+
+    def read(timeout):
+        events = inotify.read(timeout=int(timeout * 1000))
+        return {_response_name(e.name) for e in events if _watched(e.name)}
+
+    return read
+
+
+def _snapshot(response_dir):
+    """(mtime, size) for every response and sidecar file, used by the polling source"""
+    snap = {}
+    with os.scandir(response_dir) as it:
+        for entry in it:
+            if _watched(entry.name) and entry.is_file():
+                st = entry.stat()
+                snap[entry.name] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def _polling_source(response_dir, poll_interval):
+    """Event reader that diffs directory snapshots"""
+    last = _snapshot(response_dir)
+
+    def read(timeout):
+        nonlocal last
+        time.sleep(min(timeout, poll_interval))
+        current = _snapshot(response_dir)
+        changed = {n for n, sig in current.items() if last.get(n) != sig}
+        changed |= set(last) - set(current)
+        last = current
+        return {_response_name(n) for n in changed}
+
+    return read
+
+
+def _seed_state(state):
+    """
+    Reuse records from an existing outputs.jsonl so a restart only
+    reprocesses files that changed since the last conversion.
+    """
+    if not OUTPUT_FILE.exists():
+        return set(p.name for p in RESPONSE_DIR.glob("*.txt"))
+
+    converted_at = OUTPUT_FILE.stat().st_mtime
+    unwatched = 0
+    for line in OUTPUT_FILE.read_text(encoding="utf-8").splitlines():
+        record = json.loads(line)
+        name = record.get("source_file") or record["run_id"]
+        src = RESPONSE_DIR / name
+        if record.get("source_archive") and not src.is_file():
+            # Archive members (--convert --archive/--archives) have no
+            # loose file to watch; keep them as converted
+            state["records"][name] = record
+            unwatched += 1
+        elif src.is_file() and src.stat().st_mtime <= converted_at and \
+                _sidecar_mtime(src) <= converted_at:
+            state["records"][name] = record
+    if unwatched:
+        print(f"ℹ️  Keeping {unwatched} responses converted from archives")
+
+    # Scores are reused by run_id when the scored table is current
+    scored = {}
+    if SCORED_FILE.exists() and SCORED_FILE.stat().st_mtime >= converted_at:
+        scored = {row["run_id"]: row for row in
+                  pd.read_csv(SCORED_FILE).to_dict("records")}
+
+    for name, record in state["records"].items():
+        row = scored.get(record["run_id"])
+        if row is None:
+            row = analyze_bias.score_response(record, state["vs"])
+        state["rows"][name] = row
+        _apply_checks(state, name, record)
+
+    # Aggregates drop runs whose files went away while not watching
+    summary_store.sync_rows(state["agg"], state["rows"].values())
+
+    on_disk = set(p.name for p in RESPONSE_DIR.glob("*.txt"))
+    return on_disk - set(state["records"])
+
+
+def _sidecar_mtime(response_file):
+    """mtime of a response's timing sidecar (0 when it has none)"""
+    sidecar = response_file.with_suffix(SIDECAR_SUFFIX)
+    return sidecar.stat().st_mtime if sidecar.is_file() else 0
+
+
+def _apply_checks(state, name, record):
+    """Swap a file's claim counts into the running per-condition totals"""
+    _drop_checks(state, name)
+    truth, index = validate_claims.truth_for_hash(record.get("data_hash"))
+    n_claims, mismatches = validate_claims.validate_record(record, truth, index)
+    state["checks"][name] = (record, n_claims, mismatches)
+    validate_claims.tally(state["stats"], record, n_claims, mismatches)
+
+
+def _drop_checks(state, name):
+    old = state["checks"].pop(name, None)
+    if old is not None:
+        record, n_claims, mismatches = old
+        validate_claims.tally(state["stats"], record, n_claims, mismatches, sign=-1)
+
+
+def process_batch(state, names):
+    """Convert, score and validate a debounced batch of changed files"""
+    folded, removed = [], []
+    for name in sorted(names):
+        old = state["records"].get(name)
+        path = RESPONSE_DIR / name
+        record = parse_response_file(path, state["prompt_map"]) \
+            if path.is_file() else None
+        if record is None:
+            if old is not None:
+                removed.append(old["run_id"])
+            state["records"].pop(name, None)
+            state["rows"].pop(name, None)
+            _drop_checks(state, name)
+            print(f"   - {name}")
+            continue
+
+        # Keep run_id stable when a file is re-saved
+        if old is not None:
+            record["run_id"] = old["run_id"]
+        state["records"][name] = record
+        state["rows"][name] = analyze_bias.score_response(record, state["vs"])
+        _apply_checks(state, name, record)
+        folded.append(state["rows"][name])
+        print(f"   ✓ {name}")
+
+    summary_store.remove_runs(state["agg"], removed)
+    summary_store.fold_rows(state["agg"], folded)
+    _write_outputs(state)
+
+
+def _write_outputs(state):
+    """Refresh every artifact; the summary comes from the aggregate store"""
+    names = sorted(state["records"])
+    with OUTPUT_FILE.open("w", encoding="utf-8") as f:
+        for name in names:
+            f.write(json.dumps(state["records"][name]) + "\n")
+
+    Path("analysis").mkdir(exist_ok=True)
+    df = pd.DataFrame([state["rows"][n] for n in names])
+    summary_store.write_scored_table(df, SCORED_FILE, complete=True)
+
+    summary = summary_store.write_summary(state["agg"], SUMMARY_FILE)
+    if not df.empty:
+        analyze_bias.summarize_tokens(df).to_csv(TOKENS_FILE, index=False)
+
+    mismatches = [mm for n in names for mm in state["checks"][n][2]]
+    live = {f"{r['prompt_family']}_{r['condition']}"
+            for r in (state["checks"][n][0] for n in names)}
+    stats = {k: state["stats"][k] for k in live}
+    validate_claims.write_outputs(stats, mismatches)
+
+    print(f"✓ {len(names)} responses | "
+          f"{sum(s['total_claims'] for s in stats.values())} claims | "
+          f"{len(mismatches)} errors")
+
+    if not summary.empty:
+        _render_changed_figures(state, summary, df)
+
+
+def _render_changed_figures(state, summary, detailed):
+    """Re-render a figure only if the data it plots has changed"""
+    viz.FIGURES_DIR.mkdir(parents=True, exist_ok=True)
+    mentions = viz.mention_matrix(detailed)
+    inputs = {
+        "sentiment": (viz.plot_sentiment, summary,
+                      summary[["prompt_family", "condition", "vader_mean", "vader_std"]]),
+        "length": (viz.plot_length, summary,
+                   summary[["prompt_family", "condition", "len_mean"]]),
+        "mentions": (viz.plot_mentions, mentions, mentions),
+    }
+    for fig_name, (plot, data, key_frame) in inputs.items():
+        fingerprint = sha256_str(key_frame.to_csv())
+        if state["figures"].get(fig_name) != fingerprint:
+            plot(data)
+            state["figures"][fig_name] = fingerprint
+
+
+def watch(debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL):
+    """Run the watch loop until interrupted"""
+    if not RESPONSE_DIR.exists():
+        raise SystemExit("❌ No results/manual_responses/ directory.\n"
+                         "   Run: python src/run_experiment.py")
+
+    state = {
+        "prompt_map": load_prompt_map(),
+        "vs": analyze_bias.SentimentIntensityAnalyzer()
+        if analyze_bias.VADER_AVAILABLE else None,
+        "records": {},
+        "rows": {},
+        "checks": {},
+        "stats": validate_claims.new_condition_stats(),
+        "agg": summary_store.connect(),
+        "figures": {},
+    }
+
+    if INOTIFY_AVAILABLE:
+        read_events, mode = _inotify_source(RESPONSE_DIR), "inotify"
+    else:
+        read_events, mode = _polling_source(RESPONSE_DIR, poll_interval), "polling"
+
+    stale = _seed_state(state)
+    print(f"Loaded {len(state['records'])} converted responses, "
+          f"{len(stale)} to (re)process")
+    process_batch(state, stale)
+
+    print(f"\n👀 Watching {RESPONSE_DIR} ({mode}) - Ctrl+C to stop")
+    pending = {}
+    try:
+        while True:
+            now = time.monotonic()
+            for name in read_events(debounce):
+                pending[name] = now
+            now = time.monotonic()
+            ready = [n for n, t in pending.items() if now - t >= debounce]
+            if ready:
+                for name in ready:
+                    del pending[name]
+                print(f"\n🔄 {len(ready)} changed file(s)")
+                process_batch(state, ready)
+    except KeyboardInterrupt:
+        print("\n✓ Watch stopped")
+
+
+if __name__ == "__main__":
+    watch()